@@ -1,11 +1,18 @@
-from datetime import datetime
+from contextlib import nullcontext
 from pathlib import Path
 
 import click
 
+from scrape import client, documents
 from scrape import main as scraper
+from scrape import metrics
+from scrape.prefetch import DEFAULT_PREFETCH
+from scrape.ratelimit import DEFAULT_MAX_DOWNLOAD_RATE, DEFAULT_MAX_RATE
+from scrape.sinks import SINKS, compact_parquet
 
 DEFAULT_OUTPUT_DIR = Path("../data")
+DATE_FORMAT = "%Y-%m-%d"
+DEFAULT_ERRORS_PATH = Path(".run") / "errors.csv"
 
 
 @click.group()
@@ -15,22 +22,142 @@ def cli():
 
 
 @cli.command()
-@click.argument("from_date", type=str)
-@click.argument("to_date", type=str, required=False)
-@click.argument("output_dir", type=str, default=DEFAULT_OUTPUT_DIR)
+@click.argument(
+    "from_date", type=click.DateTime([DATE_FORMAT]), required=False, metavar="[FROM_DATE]"
+)
+@click.argument("to_date", type=click.DateTime([DATE_FORMAT]), required=False, metavar="[TO_DATE]")
+@click.option("--output-dir", type=str, default=DEFAULT_OUTPUT_DIR)
 @click.option("--full-refresh", is_flag=True)
+@click.option("--incremental", is_flag=True)
 @click.option("--select", type=str)
-def run(from_date, to_date, output_dir, full_refresh, select):
-    """Scrape Tweede Kamer motions from BEGIN_PAGE to END_PAGE."""
-    from_date = datetime.strptime(from_date, "%Y-%m-%d").date()
-    to_date = datetime.strptime(to_date, "%Y-%m-%d").date() if to_date else None
-    scraper.run(
-        output_dir=output_dir,
-        from_date=from_date,
-        to_date=to_date,
-        full_refresh=full_refresh,
-        select=select,
-    )
+@click.option("--concurrency", type=int, default=1)
+@click.option("--timeout", type=float, default=client.DEFAULT_TIMEOUT)
+@click.option("--retries", type=int, default=client.DEFAULT_RETRIES)
+@click.option("--no-cache", is_flag=True)
+@click.option("--cache-ttl", type=float, default=0)
+@click.option("--archive", is_flag=True)
+@click.option("--sink", type=click.Choice(list(SINKS)), default="csv")
+@click.option("--parser", type=click.Choice(list(scraper.PARSERS)), default="bs4")
+@click.option("--document-workers", type=int, default=documents.DEFAULT_WORKERS)
+@click.option("--document-timeout", type=float, default=documents.DEFAULT_TIMEOUT)
+@click.option("--max-document-size", type=int, default=documents.DEFAULT_MAX_SIZE)
+@click.option("--prefetch-pages", type=int, default=DEFAULT_PREFETCH)
+@click.option("--shards", type=int, default=1)
+@click.option("--max-rate", type=float, default=DEFAULT_MAX_RATE)
+@click.option("--max-download-rate", type=float, default=DEFAULT_MAX_DOWNLOAD_RATE)
+@click.option("--base-url", type=str)
+@click.option("--metrics-file", type=str, default=metrics.METRICS_PATH)
+@click.option("--prometheus-file", type=str)
+@click.option("--profile", is_flag=True)
+def run(
+    from_date,
+    to_date,
+    output_dir,
+    full_refresh,
+    incremental,
+    select,
+    concurrency,
+    timeout,
+    retries,
+    no_cache,
+    cache_ttl,
+    archive,
+    sink,
+    parser,
+    document_workers,
+    document_timeout,
+    max_document_size,
+    prefetch_pages,
+    shards,
+    max_rate,
+    max_download_rate,
+    base_url,
+    metrics_file,
+    prometheus_file,
+    profile,
+):
+    """Scrape Tweede Kamer motions from FROM_DATE to TO_DATE (default today).
+
+    FROM_DATE can be left out with --incremental, to continue from the last run.
+    """
+    if from_date is None and not incremental:
+        raise click.UsageError("FROM_DATE is required, unless the run is --incremental")
+    from_date = from_date.date() if from_date else None
+    to_date = to_date.date() if to_date else None
+    with metrics.profiled() if profile else nullcontext():
+        scraper.run(
+            output_dir=output_dir,
+            from_date=from_date,
+            to_date=to_date,
+            full_refresh=full_refresh,
+            select=select,
+            concurrency=concurrency,
+            timeout=timeout,
+            retries=retries,
+            cache=not no_cache,
+            cache_ttl=cache_ttl,
+            archive=archive,
+            sink=sink,
+            parser=parser,
+            document_workers=document_workers,
+            document_timeout=document_timeout,
+            max_document_size=max_document_size,
+            prefetch_pages=prefetch_pages,
+            incremental=incremental,
+            shards=shards,
+            max_rate=max_rate,
+            max_download_rate=max_download_rate,
+            base_url=base_url,
+            metrics_file=metrics_file,
+            prometheus_file=prometheus_file,
+        )
+
+
+@cli.command()
+@click.argument("output_dir", type=str, default=DEFAULT_OUTPUT_DIR)
+@click.option("--workers", type=int)
+@click.option("--sink", type=click.Choice(list(SINKS)), default="csv")
+@click.option("--parser", type=click.Choice(list(scraper.PARSERS)), default="bs4")
+def reparse(output_dir, workers, sink, parser):
+    """Rebuild OUTPUT_DIR from the archived pages, without network access."""
+    scraper.reparse(output_dir=output_dir, workers=workers, sink=sink, parser=parser)
+
+
+@cli.command()
+@click.argument("output_dir", type=str, default=DEFAULT_OUTPUT_DIR)
+def compact(output_dir):
+    """Merge the small part files of a Parquet dataset in OUTPUT_DIR."""
+    compact_parquet(output_dir)
+
+
+@cli.group()
+def errors():
+    """Inspect and retry failed stemmingen."""
+    pass
+
+
+@errors.command("list")
+def list_errors():
+    """List all motions that failed to scrape."""
+    for stem_id, url, err in scraper.get_errors().rows():
+        click.echo(f"{stem_id}  {url}  {err}")
+
+
+@errors.command("export")
+@click.argument("file_path", type=str, default=DEFAULT_ERRORS_PATH)
+def export_errors(file_path):
+    """Export the failed motions to a CSV file."""
+    scraper.get_errors().export(Path(file_path))
+
+
+@errors.command("retry")
+@click.argument("output_dir", type=str, default=DEFAULT_OUTPUT_DIR)
+@click.option("--concurrency", type=int, default=1)
+@click.option("--sink", type=click.Choice(list(SINKS)), default="csv")
+@click.option("--parser", type=click.Choice(list(scraper.PARSERS)), default="bs4")
+def retry_errors(output_dir, concurrency, sink, parser):
+    """Scrape all failed stemmingen again."""
+    scraper.retry_errors(output_dir=output_dir, concurrency=concurrency, sink=sink, parser=parser)
 
 
 @cli.command()
@@ -0,0 +1,106 @@
+import hashlib
+import json
+import os
+import threading
+import zlib
+from datetime import datetime
+from pathlib import Path
+
+import requests
+
+ARCHIVE_DIR = Path(".run") / "archive"
+
+
+class ArchiveWriter:
+    """Appends raw responses to a zlib-compressed pack file with a JSON-lines offset index.
+
+    Every writer gets its own pack, so several processes can archive at the same time.
+    """
+
+    def __init__(self, path: Path = ARCHIVE_DIR):
+        path.mkdir(parents=True, exist_ok=True)
+        name = f"{datetime.now():%Y%m%d-%H%M%S}-{os.getpid()}"
+        self.lock = threading.Lock()
+        self.pack = open(path / f"{name}.pack", "ab")
+        self.index = open(path / f"{name}.idx", "a", encoding="utf-8")
+
+        # skip responses that are already archived with the same content
+        self.seen = {(r["url"], r["sha1"]) for r in read_index(path).values()}
+
+    def add(self, url: str, kind: str, resp: requests.Response):
+        sha1 = hashlib.sha1(resp.content).hexdigest()
+        data = zlib.compress(resp.content)
+
+        with self.lock:
+            if (url, sha1) in self.seen:
+                return
+            self.seen.add((url, sha1))
+
+            offset = self.pack.tell()
+            self.pack.write(data)
+            self.pack.flush()
+
+            # only index records whose data is fully written
+            record = {
+                "url": url,
+                "kind": kind,
+                "offset": offset,
+                "length": len(data),
+                "sha1": sha1,
+                "content_type": resp.headers.get("Content-Type"),
+                "fetched_at": datetime.now().isoformat(),
+            }
+            self.index.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self.index.flush()
+
+    def close(self):
+        self.pack.close()
+        self.index.close()
+
+
+class Archive:
+    """Read-only view on all packs in the archive, the latest record per URL wins."""
+
+    def __init__(self, path: Path = ARCHIVE_DIR):
+        self.records = read_index(path)
+        self.packs = {}
+        for pack in {r["pack"] for r in self.records.values()}:
+            self.packs[pack] = os.open(path / pack, os.O_RDONLY)
+
+    def urls(self, kind: str) -> list[str]:
+        return sorted(url for url, r in self.records.items() if r["kind"] == kind)
+
+    def get(self, url: str) -> requests.Response | None:
+        record = self.records.get(url)
+        if record is None:
+            return None
+
+        data = os.pread(self.packs[record["pack"]], record["length"], record["offset"])
+
+        resp = requests.Response()
+        resp.url = url
+        resp.status_code = 200
+        resp._content = zlib.decompress(data)
+        if record["content_type"]:
+            resp.headers["Content-Type"] = record["content_type"]
+        resp.encoding = requests.utils.get_encoding_from_headers(resp.headers)
+        return resp
+
+    def close(self):
+        for fd in self.packs.values():
+            os.close(fd)
+
+
+def read_index(path: Path) -> dict[str, dict]:
+    records = {}
+    for index in sorted(path.glob("*.idx")):
+        with index.open(encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # torn last line after a crash
+                    continue
+                record["pack"] = index.with_suffix(".pack").name
+                records[record["url"]] = record
+    return records
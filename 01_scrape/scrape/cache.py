@@ -0,0 +1,207 @@
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+import requests
+
+CACHE_PATH = Path(".run") / "cache.db"
+DEFAULT_MAX_SIZE = 2 * 1024**3  # 2 GiB
+
+# kamerstuk downloads never change once published
+IMMUTABLE_PATTERNS = ["/downloads/"]
+
+
+@dataclass
+class CacheEntry:
+    url: str
+    body: bytes
+    content_type: str | None
+    etag: str | None
+    last_modified: str | None
+    fetched_at: float
+
+    def is_fresh(self, ttl: float | None) -> bool:
+        return ttl is None or time.time() - self.fetched_at < ttl
+
+    def validators(self) -> dict[str, str]:
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+    def to_response(self) -> requests.Response:
+        resp = requests.Response()
+        resp.url = self.url
+        resp.status_code = 200
+        resp._content = self.body
+        if self.content_type:
+            resp.headers["Content-Type"] = self.content_type
+        resp.encoding = requests.utils.get_encoding_from_headers(resp.headers)
+        return resp
+
+
+class ResponseCache:
+    """On-disk cache of response bodies, keyed by URL, with LRU eviction by size."""
+
+    def __init__(self, path: Path = CACHE_PATH, max_size: int = DEFAULT_MAX_SIZE):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_size = max_size
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, timeout=60, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                url TEXT PRIMARY KEY,
+                body BLOB NOT NULL,
+                content_type TEXT,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                size INTEGER NOT NULL
+            )
+        """)
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)"
+        )
+        self.conn.commit()
+        self.size = self.total_size()
+
+    def get(self, url: str) -> CacheEntry | None:
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT body, content_type, etag, last_modified, fetched_at"
+                " FROM responses WHERE url = ?",
+                (url,),
+            ).fetchone()
+            if row is None:
+                return None
+            self.conn.execute(
+                "UPDATE responses SET accessed_at = ? WHERE url = ?", (time.time(), url)
+            )
+            self.conn.commit()
+        return CacheEntry(url, *row)
+
+    def put(self, url: str, resp: requests.Response):
+        now = time.time()
+        with self.lock:
+            old = self.conn.execute("SELECT size FROM responses WHERE url = ?", (url,)).fetchone()
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    url,
+                    resp.content,
+                    resp.headers.get("Content-Type"),
+                    resp.headers.get("ETag"),
+                    resp.headers.get("Last-Modified"),
+                    now,
+                    now,
+                    len(resp.content),
+                ),
+            )
+            self.conn.commit()
+
+            self.size += len(resp.content) - (old[0] if old else 0)
+            if self.size > self.max_size:
+                self.evict()
+
+    def touch(self, url: str):
+        # a 304 confirms the cached body is still current
+        now = time.time()
+        with self.lock:
+            self.conn.execute(
+                "UPDATE responses SET fetched_at = ?, accessed_at = ? WHERE url = ?",
+                (now, now, url),
+            )
+            self.conn.commit()
+
+    def total_size(self) -> int:
+        (total,) = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()
+        return total
+
+    def evict(self):
+        # other processes may share the cache, so recount before evicting
+        total = self.total_size()
+
+        # drop least recently used entries until we are back under the limit
+        expired = []
+        for url, size in self.conn.execute(
+            "SELECT url, size FROM responses ORDER BY accessed_at"
+        ).fetchall():
+            if total <= self.max_size:
+                break
+            expired.append((url,))
+            total -= size
+        self.conn.executemany("DELETE FROM responses WHERE url = ?", expired)
+        self.conn.commit()
+        self.size = total
+
+    def close(self):
+        self.conn.close()
+
+
+def is_immutable(url: str) -> bool:
+    return any(pattern in url for pattern in IMMUTABLE_PATTERNS)
+
+
+@dataclass
+class TextEntry:
+    url: str
+    sha256: str
+    mime: str
+    text: str
+    version: int
+
+
+class TextCache:
+    """Extracted text of downloads, keyed by URL and by the SHA-256 of the file."""
+
+    def __init__(self, path: Path = CACHE_PATH):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, timeout=60, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS texts (
+                url TEXT NOT NULL,
+                sha256 TEXT NOT NULL,
+                mime TEXT NOT NULL,
+                text TEXT NOT NULL,
+                version INTEGER NOT NULL,
+                extracted_at REAL NOT NULL,
+                PRIMARY KEY (url, sha256)
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS texts_sha256 ON texts (sha256)")
+        self.conn.commit()
+
+    def get(self, sha256: str) -> TextEntry | None:
+        # the same file can be published under several URLs, any of them will do
+        return self.select("WHERE sha256 = ?", sha256)
+
+    def latest(self, url: str) -> TextEntry | None:
+        return self.select("WHERE url = ?", url)
+
+    def select(self, where: str, value: str) -> TextEntry | None:
+        with self.lock:
+            row = self.conn.execute(
+                f"SELECT url, sha256, mime, text, version FROM texts {where}"
+                " ORDER BY extracted_at DESC LIMIT 1",
+                (value,),
+            ).fetchone()
+        return TextEntry(*row) if row is not None else None
+
+    def put(self, entry: TextEntry):
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO texts VALUES (?, ?, ?, ?, ?, ?)",
+                (entry.url, entry.sha256, entry.mime, entry.text, entry.version, time.time()),
+            )
+            self.conn.commit()
+
+    def close(self):
+        self.conn.close()
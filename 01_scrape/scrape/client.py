@@ -0,0 +1,205 @@
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from scrape import metrics
+from scrape.archive import Archive, ArchiveWriter
+from scrape.cache import ResponseCache, is_immutable
+from scrape.ratelimit import THROTTLE_STATUSES, RateLimiter, retry_after
+from scrape.site import SITE_URL
+
+DEFAULT_TIMEOUT = 30.0
+DEFAULT_RETRIES = 5
+DEFAULT_BACKOFF = 0.5
+DEFAULT_POOL_SIZE = 10
+
+# bytes read at a time from a response with a size limit
+CHUNK_SIZE = 64 * 1024
+
+# transient server errors worth another try, throttling is retried by the rate limiter
+RETRY_STATUSES = [500, 502, 504]
+
+HEADERS = {
+    "Accept-Encoding": "gzip, deflate",
+    "User-Agent": "tweede-kamer-stemming-scraper",
+}
+
+
+class Client:
+    """Shared HTTP session with keep-alive connections, retries and an optional cache.
+
+    Requests that go over the network are paced by `limiter`. With `replay` set, responses come
+    from the archive only and the network is never used. With `base_url` set, requests for the
+    site go to that server instead, while cache and archive keep the original URLs. A request with
+    `max_size` is streamed and aborted as soon as its body turns out to be larger.
+    """
+
+    def __init__(
+        self,
+        timeout: float = DEFAULT_TIMEOUT,
+        retries: int = DEFAULT_RETRIES,
+        backoff: float = DEFAULT_BACKOFF,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        cache: ResponseCache | None = None,
+        cache_ttl: float = 0,
+        archive: ArchiveWriter | None = None,
+        replay: Archive | None = None,
+        limiter: RateLimiter | None = None,
+        base_url: str | None = None,
+    ):
+        self.timeout = timeout
+        self.base_url = base_url
+        self.retries = retries
+        self.limiter = limiter or RateLimiter(max_in_flight=pool_size)
+        self.cache = cache
+        self.cache_ttl = cache_ttl
+        self.archive = archive
+        self.replay = replay
+
+        # exponential backoff (backoff * 2^n) plus up to `backoff` seconds of jitter
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff,
+            backoff_jitter=backoff,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=["GET"],
+            # Retry-After is up to the rate limiter, which pauses every thread
+            respect_retry_after_header=False,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=pool_size,
+            pool_maxsize=pool_size,
+            max_retries=retry,
+        )
+
+        self.session = requests.Session()
+        self.session.headers.update(HEADERS)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def get(self, url: str, kind: str = "page", max_size: int | None = None) -> requests.Response:
+        with metrics.timer("fetch", kind=kind):
+            if self.replay is not None:
+                resp = self.replay.get(url)
+                if resp is None:
+                    raise ValueError(f"Page {url} is not archived")
+                return resp
+
+            resp = self.fetch(url, kind=kind, max_size=max_size)
+            if resp.ok and self.archive is not None:
+                self.archive.add(url, kind, resp)
+            return resp
+
+    def fetch(self, url: str, kind: str = "page", max_size: int | None = None) -> requests.Response:
+        if self.cache is None:
+            return self.send(url, kind=kind, max_size=max_size)
+
+        entry = self.cache.get(url)
+        if entry is not None and entry.is_fresh(None if is_immutable(url) else self.cache_ttl):
+            metrics.count("cache_hits_total", kind=kind)
+            return entry.to_response()
+
+        # revalidate stale entries with a conditional request
+        headers = entry.validators() if entry is not None else {}
+        resp = self.send(url, kind=kind, headers=headers, max_size=max_size)
+
+        if resp.status_code == 304 and entry is not None:
+            metrics.count("cache_revalidated_total", kind=kind)
+            self.cache.touch(url)
+            return entry.to_response()
+        if resp.ok:
+            self.cache.put(url, resp)
+        return resp
+
+    def send(
+        self, url: str, kind: str, headers: dict | None = None, max_size: int | None = None
+    ) -> requests.Response:
+        target = url
+        if self.base_url is not None and url.startswith(SITE_URL):
+            target = self.base_url.rstrip("/") + "/" + url.removeprefix(SITE_URL)
+
+        budget = self.limiter.budget(kind)
+        attempt = 0
+        while True:
+            budget.acquire()
+            start = time.monotonic()
+            try:
+                resp = self.session.get(
+                    target, timeout=self.timeout, headers=headers, stream=max_size is not None
+                )
+                fits = max_size is None or read_limited(resp, max_size)
+            except requests.RequestException:
+                latency = time.monotonic() - start
+                budget.release(None, latency)
+                metrics.count("http_responses_total", kind=kind, status="error")
+                metrics.observe("http_request_seconds", latency, kind=kind)
+                raise
+            latency = time.monotonic() - start
+            budget.release(resp.status_code, latency, retry_after(resp))
+            metrics.count("http_responses_total", kind=kind, status=str(resp.status_code))
+            metrics.observe("http_request_seconds", latency, kind=kind)
+
+            if not fits:
+                raise ValueError(f"Download {url} is larger than {max_size} bytes")
+            if resp.status_code not in THROTTLE_STATUSES or attempt >= self.retries:
+                return resp
+            attempt += 1
+
+    def close(self):
+        self.session.close()
+        if self.cache is not None:
+            self.cache.close()
+        if self.archive is not None:
+            self.archive.close()
+        if self.replay is not None:
+            self.replay.close()
+
+
+def read_limited(resp: requests.Response, max_size: int) -> bool:
+    # refuse the body up front when its Content-Length is too large, otherwise stop reading as
+    # soon as it grows past max_size
+    length = resp.headers.get("Content-Length", "")
+    if length.isdigit() and int(length) > max_size:
+        resp.close()
+        return False
+
+    chunks = []
+    size = 0
+    for chunk in resp.iter_content(CHUNK_SIZE):
+        size += len(chunk)
+        if size > max_size:
+            resp.close()
+            return False
+        chunks.append(chunk)
+    # as if it was read in full, for the cache, the archive and resp.content
+    resp._content = b"".join(chunks)
+    return True
+
+
+_client = None
+_lock = threading.Lock()
+
+
+def configure(**kwargs) -> Client:
+    global _client
+    with _lock:
+        if _client is not None:
+            _client.close()
+        _client = Client(**kwargs)
+    return _client
+
+
+def get_client() -> Client:
+    global _client
+    with _lock:
+        if _client is None:
+            _client = Client()
+    return _client
+
+
+def get(url: str, kind: str = "page", max_size: int | None = None) -> requests.Response:
+    return get_client().get(url, kind=kind, max_size=max_size)
@@ -0,0 +1,92 @@
+import re
+from datetime import date
+from functools import lru_cache
+
+import polars as pl
+from dateparser import parse as parse_date
+
+MONTHS = {
+    "januari": 1,
+    "jan": 1,
+    "februari": 2,
+    "feb": 2,
+    "maart": 3,
+    "mrt": 3,
+    "april": 4,
+    "apr": 4,
+    "mei": 5,
+    "juni": 6,
+    "jun": 6,
+    "juli": 7,
+    "jul": 7,
+    "augustus": 8,
+    "aug": 8,
+    "september": 9,
+    "sep": 9,
+    "sept": 9,
+    "oktober": 10,
+    "okt": 10,
+    "november": 11,
+    "nov": 11,
+    "december": 12,
+    "dec": 12,
+}
+
+# "12 maart 2025", also with a weekday in front or a time after it
+DATE_PATTERN = r"(\d{1,2})\s+([a-z]+)\.?\s+(\d{4})"
+DATE_REGEX = re.compile(DATE_PATTERN)
+
+
+def parse_dutch_date(value: str | None) -> date | None:
+    if not value:
+        return None
+
+    match = DATE_REGEX.search(value.lower())
+    if match and match.group(2) in MONTHS:
+        day, month, year = match.groups()
+        try:
+            return date(int(year), MONTHS[month], int(day))
+        except ValueError:
+            pass
+
+    return parse_dutch_date_fallback(value)
+
+
+def parse_dutch_date_str(value: str) -> str:
+    parsed = parse_dutch_date(value)
+    if parsed is None:
+        raise ValueError(f"Could not parse date {value!r}")
+    return parsed.strftime("%Y-%m-%d")
+
+
+@lru_cache(maxsize=4096)
+def parse_dutch_date_fallback(value: str) -> date | None:
+    parsed = parse_date(value, languages=["nl"])
+    return parsed.date() if parsed else None
+
+
+def parse_dutch_dates(values: pl.Series) -> pl.Series:
+    parts = values.str.to_lowercase().str.extract_groups(DATE_PATTERN).struct.unnest()
+    day, month, year = parts.columns
+
+    parsed = parts.select(
+        pl.concat_str(
+            pl.col(year),
+            pl.col(month).replace_strict(MONTHS, default=None, return_dtype=pl.String).str.zfill(2),
+            pl.col(day).str.zfill(2),
+            separator="-",
+        ).str.to_date("%Y-%m-%d", strict=False)
+    ).to_series()
+
+    # only strings the pattern does not cover go through dateparser, once per unique value
+    unknown = values.filter(parsed.is_null() & values.is_not_null()).unique()
+    if len(unknown) > 0:
+        mapping = {value: parse_dutch_date_fallback(value) for value in unknown}
+        fallback = values.replace_strict(mapping, default=None, return_dtype=pl.Date)
+        parsed = parsed.fill_null(fallback)
+
+    return parsed.alias(values.name)
+
+
+def dutch_date_expr(col: str) -> pl.Expr:
+    return pl.col(col).map_batches(parse_dutch_dates, return_dtype=pl.Date, is_elementwise=True)
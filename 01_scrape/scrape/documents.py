@@ -0,0 +1,267 @@
+import hashlib
+import multiprocessing
+import signal
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from io import BytesIO
+
+import magic
+from docx import Document
+from PyPDF2 import PdfReader
+
+from scrape import metrics
+from scrape.cache import TextCache, TextEntry, is_immutable
+
+DEFAULT_WORKERS = 2
+DEFAULT_TIMEOUT = 60.0
+DEFAULT_MAX_SIZE = 50 * 1024**2
+
+# extra time the caller waits for a worker that is stuck where its alarm cannot fire
+RESULT_GRACE = 10.0
+
+# bump the version of a document type after changing how its text is extracted, so the cached
+# texts of that type are extracted again
+EXTRACTOR_VERSIONS = {
+    "docx": 1,
+    "pdf": 1,
+}
+
+
+class ExtractionTimeout(BaseException):
+    # not an Exception, so the broad excepts inside the PDF reader cannot swallow it
+    pass
+
+
+class DocumentExtractor:
+    """Extracts the text of DOCX and PDF downloads in worker processes.
+
+    Extraction is CPU bound, so it runs outside the scraper's threads. Documents above `max_size`
+    bytes are refused and every document gets `timeout` seconds from its submission, so the wait
+    for a free worker counts as well. With `workers=0` the text is
+    extracted inline instead. With a `cache`, a file is only extracted again when its bytes or
+    the extractor version of its type changed.
+    """
+
+    def __init__(
+        self,
+        workers: int = DEFAULT_WORKERS,
+        timeout: float = DEFAULT_TIMEOUT,
+        max_size: int = DEFAULT_MAX_SIZE,
+        cache: TextCache | None = None,
+    ):
+        self.workers = workers
+        self.timeout = timeout
+        self.max_size = max_size
+        self.cache = cache
+        self.pool = self.start() if workers > 0 else None
+
+    def start(self) -> ProcessPoolExecutor:
+        # spawn, because forking a process with running threads can deadlock
+        return ProcessPoolExecutor(
+            max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+        )
+
+    def cached(self, url: str) -> Future | None:
+        # downloads never change, so a current text for the URL saves fetching the file at all
+        if self.cache is None or not is_immutable(url):
+            return None
+        entry = self.cache.latest(url)
+        if entry is None or not is_current(entry):
+            return None
+        metrics.count("documents_cached_total", kind=document_kind(entry.mime))
+        return completed((entry.mime, entry.text))
+
+    def submit(self, url: str, content: bytes) -> Future:
+        if len(content) > self.max_size:
+            raise ValueError(f"Download {url} is larger than {self.max_size} bytes")
+
+        sha256 = hashlib.sha256(content).hexdigest()
+        if self.cache is not None:
+            entry = self.cache.get(sha256)
+            if entry is not None and is_current(entry):
+                if entry.url != url:
+                    self.cache.put(TextEntry(url, sha256, entry.mime, entry.text, entry.version))
+                metrics.count("documents_cached_total", kind=document_kind(entry.mime))
+                return completed((entry.mime, entry.text))
+
+        started = time.monotonic()
+        future = self.extract(content)
+        future.add_done_callback(partial(observe_extraction, started))
+        if self.cache is not None:
+            future.add_done_callback(partial(self.store, url, sha256))
+        return future
+
+    def extract(self, content: bytes) -> Future:
+        if self.pool is None:
+            try:
+                return completed(extract_text(content))
+            except Exception as err:
+                future = Future()
+                future.set_exception(err)
+                return future
+
+        submitted = time.time()
+        try:
+            future = self.pool.submit(extract_text, content, self.timeout, submitted)
+        except BrokenProcessPool:
+            # a worker died (e.g. out of memory), start over with fresh ones
+            self.pool = self.start()
+            future = self.pool.submit(extract_text, content, self.timeout, submitted)
+        # for result(), which waits no longer than the worker may take
+        future.deadline = time.monotonic() + self.timeout + RESULT_GRACE
+        return future
+
+    def store(self, url: str, sha256: str, future: Future):
+        if future.cancelled() or future.exception() is not None:
+            return
+        mime, text = future.result()
+        version = EXTRACTOR_VERSIONS[document_kind(mime)]
+        self.cache.put(TextEntry(url, sha256, mime, text, version))
+
+    def result(self, url: str, future: Future) -> str:
+        deadline = getattr(future, "deadline", None)
+        try:
+            _, text = future.result(
+                timeout=None if deadline is None else max(0.0, deadline - time.monotonic())
+            )
+        except TimeoutError:
+            # still queued behind slow documents, then it never takes a worker
+            future.cancel()
+            raise ValueError(f"Extracting text from {url} took longer than {self.timeout}s")
+        return text
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown(cancel_futures=True)
+        if self.cache is not None:
+            self.cache.close()
+
+
+def observe_extraction(started: float, future: Future):
+    # from submit to done, so the wait for a free worker counts as well
+    seconds = time.monotonic() - started
+    if future.cancelled() or future.exception() is not None:
+        metrics.count("stage_errors_total", stage="extract", kind="unknown")
+        metrics.observe("stage_seconds", seconds, stage="extract", kind="unknown")
+        return
+    mime, _ = future.result()
+    metrics.observe("stage_seconds", seconds, stage="extract", kind=document_kind(mime))
+
+
+def completed(result) -> Future:
+    future = Future()
+    future.set_result(result)
+    return future
+
+
+def is_current(entry: TextEntry) -> bool:
+    return entry.version == EXTRACTOR_VERSIONS.get(document_kind(entry.mime))
+
+
+def document_kind(mime: str) -> str | None:
+    if "wordprocessingml" in mime:
+        return "docx"
+    if mime == "application/pdf":
+        return "pdf"
+    return None
+
+
+def extract_text(
+    content: bytes, timeout: float | None = None, submitted: float | None = None
+) -> tuple[str, str]:
+    # runs in a worker process, where an alarm interrupts a document that takes too long; the time
+    # counts from submission, so a document that waited in the queue gets what is left
+    remaining = timeout
+    if timeout is not None and submitted is not None:
+        remaining -= time.time() - submitted
+        if remaining <= 0:
+            raise TimeoutError(f"Document waited longer than {timeout}s for a worker")
+    alarm = timeout is not None and hasattr(signal, "setitimer")
+    if alarm:
+        signal.signal(signal.SIGALRM, raise_timeout)
+        signal.setitimer(signal.ITIMER_REAL, remaining)
+    try:
+        return parse_document(content)
+    except ExtractionTimeout:
+        raise TimeoutError(f"Document extraction took longer than {timeout}s")
+    finally:
+        if alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+
+
+def raise_timeout(signum, frame):
+    raise ExtractionTimeout()
+
+
+def parse_document(content: bytes) -> tuple[str, str]:
+    file_bytes = BytesIO(content)
+
+    # detect file type
+    file_type = magic.from_buffer(file_bytes.getvalue(), mime=True)
+    kind = document_kind(file_type)
+
+    text_parts = []
+    if kind == "docx":
+        # DOCX parser
+        doc = Document(file_bytes)
+
+        # paragraphs
+        for p in doc.paragraphs:
+            if p.text.strip():
+                text_parts.append(p.text.strip())
+
+        # tables
+        for table in doc.tables:
+            for row in table.rows:
+                for cell in row.cells:
+                    if cell.text.strip():
+                        text_parts.append(cell.text.strip())
+
+    elif kind == "pdf":
+        # PDF parser
+        reader = PdfReader(file_bytes)
+        for page in reader.pages:
+            text = page.extract_text()
+            if text:
+                text_parts.append(text.strip())
+
+    else:
+        raise ValueError(f"Unsupported file type: {file_type}")
+
+    # combine and normalize whitespace
+    motie_text = " ".join(text_parts)
+    motie_text = " ".join(motie_text.split())
+
+    return file_type, motie_text
+
+
+_extractor = None
+_lock = threading.Lock()
+
+
+def configure(**kwargs) -> DocumentExtractor:
+    global _extractor
+    with _lock:
+        if _extractor is not None:
+            _extractor.close()
+        _extractor = DocumentExtractor(**kwargs)
+    return _extractor
+
+
+def get_extractor() -> DocumentExtractor:
+    global _extractor
+    with _lock:
+        if _extractor is None:
+            _extractor = DocumentExtractor(workers=0)
+    return _extractor
+
+
+def close():
+    global _extractor
+    with _lock:
+        if _extractor is not None:
+            _extractor.close()
+        _extractor = None
@@ -1,32 +1,30 @@
 # A new beginning, let the behaviour be known
-import json
+import multiprocessing
+import multiprocessing.util
 import os
-import re
 import ssl
 from collections.abc import Iterator
-from datetime import date, datetime
-from io import BytesIO
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from functools import partial
+from itertools import repeat
 from pathlib import Path
 
 import click
-import magic
 import polars as pl
-import requests
 import wget
-from bs4 import BeautifulSoup
-from dateparser import parse as parse_date
-from docx import Document
-from PyPDF2 import PdfReader
-
-STEMMINGSUITSLAGEN_URL = (
-    "https://www.tweedekamer.nl/kamerstukken/stemmingsuitslagen"
-    "?qry=%2A&fld_tk_categorie=Kamerstukken&fld_prl_kamerstuk=Stemmingsuitslagen"
-    "&fromdate={from_date}&todate={to_date}"
-    "&srt=date%3Adesc%3Adate&page={page}"
-)
-DEBAT_URL = "https://www.tweedekamer.nl/{link}"
-MOTIE_URL = "https://www.tweedekamer.nl/{link}"
-DOWNLOAD_URL = "https://www.tweedekamer.nl/{link}"
+
+from scrape import client, documents, metrics, soup, xpath
+from scrape.archive import Archive, ArchiveWriter
+from scrape.cache import ResponseCache, TextCache
+from scrape.dates import parse_dutch_date_str
+from scrape.memo import Memo
+from scrape.prefetch import DEFAULT_PREFETCH, prefetch
+from scrape.ratelimit import DEFAULT_MAX_DOWNLOAD_RATE, DEFAULT_MAX_RATE, RateLimiter
+from scrape.sinks import CsvSink, ParquetSink, PostgresSink, compact_parquet, make_sink
+from scrape.site import DEBAT_URL, GEEN_INDIENERS, MOTIE_URL, STEMMINGSUITSLAGEN_URL
+from scrape.state import ErrorLedger, ProgressStore
+from scrape.tables import TableBuilder
 
 STEMMING_SCHEMA = {
     "stemming_id": str,
@@ -69,269 +67,517 @@ DETAILS_SCHEMA = {
     "vergissing": bool,
 }
 
-WETSVOORSTELLEN = [
-    "wetsvoorstel",
-    "voorstel van wet",
-    "voorstel van wet (initiatiefvoorstel)",
-    "eindtekst",
-]
+# voting details can show up some days after a stemming is published, so incremental runs
+# scrape the stemmingen of this window again
+LATE_DETAILS_GRACE = timedelta(days=7)
 
-GEEN_INDIENERS = [
-    *WETSVOORSTELLEN,
-    "advies afdeling advisering raad van state",
-    "memorie van toelichting",
-]
+# HTML extraction backends, both produce the same dicts
+PARSERS = {
+    "bs4": soup,
+    "lxml": xpath,
+}
 
 
 def run(
-    from_date: date,
+    from_date: date | None,
     to_date: date | None,
     output_dir: str,
     full_refresh: bool,
     select: str | None,
+    concurrency: int = 1,
+    timeout: float = client.DEFAULT_TIMEOUT,
+    retries: int = client.DEFAULT_RETRIES,
+    cache: bool = True,
+    cache_ttl: float = 0,
+    archive: bool = False,
+    sink: str = "csv",
+    parser: str = "bs4",
+    document_workers: int = documents.DEFAULT_WORKERS,
+    document_timeout: float = documents.DEFAULT_TIMEOUT,
+    max_document_size: int = documents.DEFAULT_MAX_SIZE,
+    prefetch_pages: int = DEFAULT_PREFETCH,
+    incremental: bool = False,
+    shards: int = 1,
+    compact: bool = True,
+    max_rate: float = DEFAULT_MAX_RATE,
+    max_download_rate: float = DEFAULT_MAX_DOWNLOAD_RATE,
+    base_url: str | None = None,
+    metrics_file: str | None = str(metrics.METRICS_PATH),
+    prometheus_file: str | None = None,
 ):
+    options = dict(locals())
+
+    progress = read_progress()
+    settled_before = None
+    if incremental:
+        settled_before = date.today() - LATE_DETAILS_GRACE
+        from_date = from_date or incremental_start(progress)
+        print(f"Continuing from {from_date}, refreshing stemmingen since {settled_before}")
+    elif from_date is None:
+        raise ValueError("A from date is required, unless the run is incremental")
+
     to_date = max(to_date or date.today(), from_date)
+    metrics.configure()
+    if shards > 1:
+        progress.close()
+        try:
+            run_shards(from_date=from_date, to_date=to_date, shards=shards, options=options)
+        finally:
+            report_metrics(metrics_file=metrics_file, prometheus_file=prometheus_file)
+        return
+
     select = parse_select_argument(select)
 
-    progress = read_progress()
+    pool_size = max(concurrency, client.DEFAULT_POOL_SIZE)
+    client.configure(
+        timeout=timeout,
+        retries=retries,
+        pool_size=pool_size,
+        cache=ResponseCache() if cache else None,
+        cache_ttl=cache_ttl,
+        archive=ArchiveWriter() if archive else None,
+        limiter=RateLimiter(
+            max_rate=max_rate,
+            max_download_rate=max_download_rate,
+            max_in_flight=pool_size,
+        ),
+        base_url=base_url,
+    )
+    documents.configure(
+        workers=document_workers,
+        timeout=document_timeout,
+        max_size=max_document_size,
+        cache=TextCache() if cache else None,
+    )
 
+    output = make_sink(sink, output_dir, compact=compact)
+    reset_moties()
+
+    try:
+        scrape_listings(
+            from_date=from_date,
+            to_date=to_date,
+            output=output,
+            select=select,
+            progress=progress,
+            full_refresh=full_refresh,
+            concurrency=concurrency,
+            parser=parser,
+            prefetch_pages=prefetch_pages,
+            settled_before=settled_before,
+        )
+    finally:
+        output.close()
+        documents.close()
+        print(f"Reused {get_moties().hits} motie pages")
+        metrics.count("motie_pages_reused_total", get_moties().hits)
+        reset_moties()
+        report_metrics(metrics_file=metrics_file, prometheus_file=prometheus_file)
+
+
+def run_shards(from_date: date, to_date: date, shards: int, options: dict):
+    windows = split_dates(from_date, to_date, shards)
+    print(f"Scraping {from_date}..{to_date} in {len(windows)} shards")
+
+    # every window is a run of its own, in a fresh process; the shared stores are SQLite in WAL
+    # mode and the shards touch disjoint stemmingen, so their updates never overlap
+    runs = [
+        {
+            **options,
+            "from_date": start,
+            "to_date": end,
+            "shards": 1,
+            "compact": False,
+            # the site sees all shards together
+            "max_rate": options["max_rate"] / len(windows),
+            "max_download_rate": options["max_download_rate"] / len(windows),
+            # the parent reports the metrics of all shards together
+            "metrics_file": None,
+            "prometheus_file": None,
+        }
+        for start, end in windows
+    ]
+    failed = []
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=len(runs), mp_context=context) as pool:
+        futures = [pool.submit(run_shard, shard) for shard in runs]
+        for (start, end), future in zip(windows, futures):
+            try:
+                err, shard_metrics = future.result()
+                metrics.get_metrics().merge(shard_metrics)
+            except Exception as exc:
+                # the shard process itself died, e.g. killed for running out of memory
+                err = exc
+            if err is not None:
+                print(f"Failed shard {start}..{end}: {err}")
+                failed.append(f"{start}..{end}")
+
+    # shards do not compact, that happens once all of them are done; the windows that did
+    # succeed are kept
+    if options["sink"] == "parquet":
+        compact_parquet(options["output_dir"])
+
+    if failed:
+        raise ValueError(f"{len(failed)} of {len(windows)} shards failed: {', '.join(failed)}")
+
+
+def run_shard(options: dict) -> tuple[str | None, metrics.Metrics]:
+    try:
+        run(**options)
+    except Exception as err:
+        return str(err), metrics.get_metrics()
+    return None, metrics.get_metrics()
+
+
+def report_metrics(metrics_file: str | None, prometheus_file: str | None):
+    # shards report through their parent
+    if metrics_file is None and prometheus_file is None:
+        return
+    stats = metrics.get_metrics()
+    print("Time per stage:")
+    stats.print_stages()
+    if metrics_file is not None:
+        stats.write_json(Path(metrics_file))
+    if prometheus_file is not None:
+        stats.write_prometheus(Path(prometheus_file))
+
+
+def split_dates(from_date: date, to_date: date, shards: int) -> list[tuple[date, date]]:
+    # consecutive windows of (nearly) equal length that cover every day exactly once
+    days = (to_date - from_date).days + 1
+    shards = max(1, min(shards, days))
+    bounds = [from_date + timedelta(days=days * k // shards) for k in range(shards + 1)]
+    return [(bounds[k], bounds[k + 1] - timedelta(days=1)) for k in range(shards)]
+
+
+def scrape_listings(
+    from_date: date,
+    to_date: date,
+    output: CsvSink | ParquetSink | PostgresSink,
+    select: list[str] | None,
+    progress: ProgressStore,
+    full_refresh: bool,
+    concurrency: int = 1,
+    parser: str = "bs4",
+    prefetch_pages: int = DEFAULT_PREFETCH,
+    settled_before: date | None = None,
+):
+    # the next listing pages are fetched while the stemmingen of this one are scraped
+    pages = prefetch(
+        iter_listing_pages(
+            from_date=from_date,
+            to_date=to_date,
+            parser=parser,
+            progress=progress,
+            settled_before=settled_before,
+        ),
+        size=prefetch_pages,
+    )
+    for url, cards in pages:
+        for data in parse_listings_page(
+            url=url,
+            cards=cards,
+            select=select,
+            progress=progress,
+            full_refresh=full_refresh,
+            concurrency=concurrency,
+            parser=parser,
+            settled_before=settled_before,
+        ):
+            if len(data["stemming"]) != 1:
+                raise ValueError(f"Multiple votings in one page for {url}")
+
+            write_stemming(data, output)
+
+
+def iter_listing_pages(
+    from_date: date,
+    to_date: date,
+    parser: str = "bs4",
+    progress: ProgressStore | None = None,
+    settled_before: date | None = None,
+) -> Iterator[tuple[str, list[dict]]]:
+    backend = PARSERS[parser]
     page = 0
-    result = None
     while True:
         print(f"Page {page:02d}")
 
         url = STEMMINGSUITSLAGEN_URL.format(from_date=from_date, to_date=to_date, page=page)
-        resp = requests.get(url)
+        resp = client.get(url, kind="listing")
         if not resp.ok:
             raise ValueError(f"Page {url} does not respond")
 
         if "Geen zoekresultaten" in resp.text:
             print(f"No further pages found.")
-            break
+            return
 
-        soup = BeautifulSoup(resp.content, "lxml")
-        for data in parse_listings_page(
-            url=url, soup=soup, select=select, progress=progress, full_refresh=full_refresh
-        ):
-            if len(data["stemming"]) != 1:
-                raise ValueError(f"Multiple votings in one page for {url}")
+        with metrics.timer("parse", kind="listing"):
+            doc = backend.parse_html(resp.content)
+        cards = backend.parse_listing_cards(url, doc)
 
-            stem_id = data["stemming"]["stemming_id"].item()
-            stem_dt = data["stemming"]["datum"].item()
-            stem_dt = parse_dutch_date_str(stem_dt)
+        # the listing is sorted newest first, so everything after a settled page is settled too
+        if settled_before is not None and cards:
+            if all(is_settled(progress, card, settled_before) for card in cards):
+                print(f"Reached stemmingen processed before {settled_before}.")
+                return
 
-            write_tables(data, Path(output_dir) / stem_dt / stem_id)
+        yield url, cards
 
         page += 1
 
 
+def incremental_start(progress: ProgressStore) -> date:
+    latest = progress.latest_date()
+    if latest is None:
+        raise ValueError("No earlier run to continue from, pass a from date")
+    return date.fromisoformat(latest) - LATE_DETAILS_GRACE
+
+
+def retry_errors(output_dir: str, concurrency: int = 1, sink: str = "csv", parser: str = "bs4"):
+    stem_ids = get_errors().stemming_ids()
+    if not stem_ids:
+        print("No failed stemmingen.")
+        return
+
+    dates = ProgressStore().dates(stem_ids)
+    for stem_id in stem_ids - dates.keys():
+        print(f"Cannot retry {stem_id}, its date is unknown")
+    if not dates:
+        return
+
+    run(
+        from_date=date.fromisoformat(min(dates.values())),
+        to_date=date.fromisoformat(max(dates.values())),
+        output_dir=output_dir,
+        full_refresh=False,
+        select=" ".join(sorted(dates)),
+        concurrency=concurrency,
+        sink=sink,
+        parser=parser,
+    )
+
+
+def reparse(output_dir: str, workers: int | None = None, sink: str = "csv", parser: str = "bs4"):
+    urls = Archive().urls("stemming")
+    print(f"Reparsing {len(urls)} stemmingen from archive")
+
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=init_replay, initargs=(output_dir, sink)
+    ) as pool:
+        results = pool.map(reparse_stemming_page, urls, repeat(parser))
+        for url, err in zip(urls, results):
+            if err is not None:
+                print(f"Failed {url}: {err}")
+
+    # workers do not compact, that happens once all of them are done
+    if sink == "parquet":
+        compact_parquet(output_dir)
+
+
+def init_replay(output_dir: str, sink: str):
+    global _errors, _output
+    _errors = None
+    client.configure(replay=Archive())
+    documents.configure(workers=0, cache=TextCache())
+    reset_moties()
+
+    # one sink per worker, closed when the worker exits (atexit does not run in pool workers)
+    _output = make_sink(sink, output_dir, compact=False)
+    multiprocessing.util.Finalize(_output, _output.close, exitpriority=10)
+
+
+def reparse_stemming_page(url: str, parser: str) -> str | None:
+    try:
+        data, ok = parse_stemming_page(url=url, parser=parser)
+        if len(data["stemming"]) != 1:
+            raise ValueError(f"Multiple votings in one page for {url}")
+        write_stemming(data, _output)
+        _output.flush()
+    except Exception as err:
+        return str(err)
+    finally:
+        flush_errors()
+    return None if ok else "some motions failed, see errors"
+
+
 def parse_listings_page(
     url: str,
-    soup: BeautifulSoup,
+    cards: list[dict],
     select: list[str] | None,
-    progress: dict[str, list],
+    progress: ProgressStore,
     full_refresh: bool,
+    concurrency: int = 1,
+    parser: str = "bs4",
+    settled_before: date | None = None,
 ) -> Iterator[dict[str, pl.DataFrame]]:
-    cards = []
-    for card in soup.select("div.m-card, div.u-mt-6.m-card"):
-        a_tag = card.select_one("h4.u-mt-0 > a")
-        if a_tag:
-            link = a_tag["href"]
-
-        time_tag = card.select_one("time.u-text-primary")
-        if time_tag:
-            stem_dt = time_tag.get_text(strip=True)
-            stem_dt = parse_dutch_date_str(stem_dt)
-
-        id_tag = card.select_one("p.u-text-dark-gray")
-        if id_tag:
-            stem_id = id_tag.get_text(strip=True)
-
-        cards.append(
-            {
-                "link": link,
-                "stem_dt": stem_dt,
-                "stem_id": stem_id,
-            }
-        )
-
-    if len(cards) == 0:
-        raise ValueError(f"No links found for {url}")
-
     for card in cards:
         if select is not None and card["stem_id"] not in select:
             continue
 
         if not full_refresh and already_processed(progress, card["stem_dt"], card["stem_id"]):
-            continue
+            # within the grace window the details may have changed since
+            if settled_before is None or is_settled(progress, card, settled_before):
+                continue
 
         print(card["stem_dt"], card["stem_id"], card["link"])
-        result, ok = parse_stemming_page(url=DEBAT_URL.format(link=card["link"].strip("/")))
+        print(f"  [{client.get_client().limiter.status()}]")
+        result, ok = parse_stemming_page(
+            url=DEBAT_URL.format(link=card["link"].strip("/")),
+            concurrency=concurrency,
+            parser=parser,
+        )
         yield result
 
         if ok:
             rem_error(stem_id=card["stem_id"])
+        flush_errors()
 
-        progress.setdefault(card["stem_dt"], []).append(card["stem_id"])
-        write_progress(progress)
+        progress.add(card["stem_dt"], card["stem_id"])
 
 
-def parse_stemming_page(url: str) -> tuple[dict[str, pl.DataFrame], bool]:
+def parse_stemming_page(
+    url: str, concurrency: int = 1, parser: str = "bs4"
+) -> tuple[dict[str, pl.DataFrame], bool]:
     result = create_tables()
     res_ok = True
 
-    resp = requests.get(url)
+    resp = client.get(url, kind="stemming")
     if not resp.ok:
         raise ValueError(f"Page {url} does not respond")
-    soup = BeautifulSoup(resp.content, "lxml")
+    backend = PARSERS[parser]
+    with metrics.timer("parse", kind="stemming"):
+        doc = backend.parse_html(resp.content)
+    metrics.count("stemmingen_total")
 
     # parse voting
 
-    stemming_info = parse_stemming_page_info(url=url, soup=soup)
-    result["stemming"] = pl.concat([result["stemming"], pl.DataFrame(stemming_info)])
+    stemming_info = backend.parse_stemming_page_info(url, doc)
+    result.add("stemming", stemming_info)
 
     # parse individual motions
 
-    cards = soup.select("div.m-card")
-    if len(cards) == 0:
-        return result, res_ok
-
-    for k, card in enumerate(cards):
-        # Find the main motion link
-        link_tag = card.select_one("h3.m-card__title > a")
-        if link_tag is None:
-            raise ValueError(f"Cannot find link of motion {k} for {url}")
-        link = link_tag["href"]
+    motions = []
+    for link, besluit in backend.parse_motion_cards(url, doc):
         print("  " + link)
+        motions.append((MOTIE_URL.format(link=link.strip("/")), besluit))
 
-        # Find the paragraph with "Besluit"
-        besluit_tag = None
-        for p in card.select("p.u-mt-8"):
-            if "Besluit" in p.get_text():
-                besluit_tag = p.select_one("span.u-font-bold")
-                break
-        if besluit_tag is None:
-            raise ValueError(f"Cannot find decision of motion {k} for {url}")
-        besluit = besluit_tag.get_text(strip=True).strip(".")
+    if len(motions) == 0:
+        return build_tables(result), res_ok
 
-        try:
-            motie_data = parse_motie_page(
-                url=MOTIE_URL.format(link=link.strip("/")),
+    # fetch motions in parallel, but collect them in page order
+    with ThreadPoolExecutor(max_workers=max(concurrency, 1)) as pool:
+        futures = [
+            pool.submit(
+                parse_motie_page,
+                url=motie_url,
                 stemming_id=stemming_info["stemming_id"],
                 besluit=besluit,
+                parser=parser,
             )
-        except Exception as err:
-            print(f"Failed {url}")
+            for motie_url, besluit in motions
+        ]
+
+        for (motie_url, _), future in zip(motions, futures):
+            try:
+                motie_data = future.result()
+                resolve_documents(motie_data)
+            except Exception as err:
+                print(f"Failed {url}")
+                rem_error(
+                    stem_id=stemming_info["stemming_id"],
+                )
+                add_error(
+                    stem_id=stemming_info["stemming_id"],
+                    url=motie_url,
+                    err=err,
+                )
+                res_ok = False
+                metrics.count("motions_total", status="failed")
+                continue
+
+            result.merge(motie_data)
+            metrics.count("motions_total", status="ok")
+
             rem_error(
                 stem_id=stemming_info["stemming_id"],
+                url=motie_url,
             )
-            add_error(
-                stem_id=stemming_info["stemming_id"],
-                url=MOTIE_URL.format(link=link.strip("/")),
-                err=err,
-            )
-            res_ok = False
-            continue
 
-        result = merge_tables(result, motie_data)
+    return build_tables(result), res_ok
 
-        rem_error(
-            stem_id=stemming_info["stemming_id"],
-            url=MOTIE_URL.format(link=link.strip("/")),
-        )
 
-    return result, res_ok
+def build_tables(data: TableBuilder) -> dict[str, pl.DataFrame]:
+    with metrics.timer("build"):
+        return data.build()
 
 
-def parse_stemming_page_info(url: str, soup: BeautifulSoup) -> dict:
-    # stemming id & did
-    match = re.search(r"id=([^&]+)&(?:did|dossier)=([^&]+)", url)
-    if not match:
-        raise ValueError(f"ID and DID missing from motion for {url}")
-    stemming_id = match.group(1)
-    stemming_did = match.group(2)
+def resolve_documents(data: TableBuilder):
+    # wait for the texts of the downloads that were extracted in the background
+    for row in data.rows["motie"]:
+        if isinstance(row["text"], Future):
+            row["text"] = documents.get_extractor().result(row["download"], row["text"])
 
-    # stemming title
-    meta_tag = soup.select_one('meta[name="dcterms.title"]')
-    if meta_tag is None:
-        ValueError(f"Stemming title is missing for {url}")
-    stemming_title = meta_tag["content"]
 
-    # stemming type & date
-    h2_tags = soup.select("h2")
-    if len(h2_tags) != 1:
-        raise ValueError(f"Stemming subtitle is missing or not unique for {url}")
+def parse_motie_page(
+    url: str,
+    stemming_id: str,
+    besluit: str | None,
+    parser: str = "bs4",
+) -> TableBuilder:
+    # a motie voted on in several stemmingen is fetched and parsed only once per run
+    moties = get_moties()
+    page = moties.get(url, parse_motie_content, url=url, parser=parser)
+    for row in page.rows["motie"]:
+        if isinstance(row["text"], Future):
+            # a failed extraction is not kept either, the next stemming with the motie tries again
+            row["text"].add_done_callback(partial(forget_failed, moties, url, page))
+    return bind_motie(page, stemming_id=stemming_id, besluit=besluit)
 
-    for h2 in h2_tags:
-        span = h2.select_one("span.u-font-normal")
-        if span is None:
-            raise ValueError(f"Stemming date is missing for {url}")
-        stemming_date = span.get_text(strip=True)
 
-        # The meeting type is everything in h2 minus the span
-        stemming_type = h2.contents[0].strip() if h2.contents else None
-        if type is None:
-            raise ValueError(f"Stemming type is missing for {url}")
+def forget_failed(moties: Memo, url: str, page: TableBuilder, future: Future):
+    if future.cancelled() or future.exception() is not None:
+        moties.forget(url, page)
 
-    return {
-        "stemming_id": stemming_id,
-        "stemming_did": stemming_did,
-        "titel": stemming_title,
-        "datum": stemming_date,
-        "type": stemming_type,
-    }
 
+def bind_motie(page: TableBuilder, stemming_id: str, besluit: str | None) -> TableBuilder:
+    # copy the shared rows, with the fields that differ per stemming filled in
+    data = create_tables()
+    for key, rows in page.rows.items():
+        data.extend(key, [{**row, "stemming_id": stemming_id} for row in rows])
+    for row in data.rows["motie"]:
+        row["besluit"] = besluit
+    return data
 
-def parse_motie_page(
-    url: str,
-    stemming_id: str,
-    besluit: str | None,
-) -> dict[str, pl.DataFrame]:
+
+def parse_motie_content(url: str, parser: str = "bs4") -> TableBuilder:
     data = create_tables()
 
-    resp = requests.get(url)
+    resp = client.get(url, kind="motie")
     if not resp.ok:
         raise ValueError(f"Page {url} does not respond")
-    soup = BeautifulSoup(resp.content, "lxml")
+    backend = PARSERS[parser]
+    with metrics.timer("parse", kind="motie"):
+        doc = backend.parse_html(resp.content)
 
-    motie_info = parse_motie_info(url=url, soup=soup)
-    motie_info = {
-        "stemming_id": stemming_id,
-        **motie_info,
-        "besluit": besluit,
-    }
+    motie_info = backend.parse_motie_info(url, doc)
+    if motie_info["is_fallback"]:
+        # a pending text, resolved in parse_stemming_page
+        motie_info["text"] = parse_text_from_download(url=motie_info["download"])
 
     if motie_info["type"].lower().strip() not in GEEN_INDIENERS:
-        indieners_info = parse_indieners_info(url=url, soup=soup)
+        indieners_info = backend.parse_indieners_info(url, doc)
         for row in indieners_info:
-            row["stemming_id"] = motie_info["stemming_id"]
             row["motie_id"] = motie_info["motie_id"]
     else:
         indieners_info = []
 
-    h2 = soup.find("h2", string=lambda t: t and "Stemmingsuitslagen" in t)
-    if h2 is not None:
-        # motie uitslag text
-        h3 = h2.find_next("h3")
-        if h3 is None:
-            raise ValueError(f"Uitslag is missing from stemmingsuitslagen for {url}")
-        motie_info["uitslag"] = h3.get_text(strip=True)
-
-        # motie uitslag counts
-
-        # Voor
-        vote_result = soup.select_one("div.m-vote-result__bar")
-        motie_info["voor"] = int(vote_result.get("data-vote-result", "0") or "0")
-
-        # Vereist & Totaal: inside hidden spans
-        labels = soup.select("div.m-vote-result__label")
-        motie_info["vereist"] = int(labels[1].find("span").get_text(strip=True).split(": ")[1])
-        motie_info["totaal"] = int(labels[2].find("span").get_text(strip=True).split(": ")[1])
+    uitslag_info = backend.parse_uitslag_info(url, doc)
+    if uitslag_info is not None:
+        motie_info.update(uitslag_info)
 
         # motie uitslag details
-        details_info = parse_details_info(url=url, soup=soup)
+        details_info = backend.parse_details_info(url, doc)
         for row in details_info:
-            row["stemming_id"] = motie_info["stemming_id"]
             row["motie_id"] = motie_info["motie_id"]
     else:
         for key in ["uitslag", "voor", "vereist", "totaal"]:
@@ -339,239 +585,25 @@ def parse_motie_page(
         details_info = []
 
     # dump data into tables
-    data["motie"] = pl.concat([data["motie"], pl.DataFrame(motie_info, schema=MOTIE_SCHEMA)])
-    data["indieners"] = pl.concat(
-        [data["indieners"], pl.DataFrame(indieners_info, schema=INDIENERS_SCHEMA)]
-    )
-    data["details"] = pl.concat(
-        [data["details"], pl.DataFrame(details_info, schema=DETAILS_SCHEMA)]
-    )
+    data.add("motie", motie_info)
+    data.extend("indieners", indieners_info)
+    data.extend("details", details_info)
 
     return data
 
 
-def parse_motie_info(url: str, soup: BeautifulSoup) -> dict:
-    # motie id & did
-    match = re.search(r"id=([^&]+)&(?:did|dossier)=([^&]+)", url)
-    if not match:
-        raise ValueError(f"ID and DID missing from motion for {url}")
-    motie_id = match.group(1)
-    motie_did = match.group(2)
-
-    # motie document nr
-    doc_nr_spans = soup.select("span.h-visually-hidden")
-    all_doc_nrs = [
-        span.next_sibling.strip() for span in doc_nr_spans if "Nummer:" in span.get_text()
-    ]
-    if len(all_doc_nrs) != 1:
-        raise ValueError(f"Document nr missing or not unique for {url}")
-    motie_document_nr = all_doc_nrs[0]
-
-    # motie date
-    date_spans = soup.select("span.h-visually-hidden")
-    all_dates = [span.next_sibling.strip() for span in date_spans if "Datum:" in span.get_text()]
-    if len(all_dates) != 1:
-        raise ValueError(f"Date missing or not unique for {url}")
-    motie_date = all_dates[0]
-
-    # motion type & title
-    all_titles = []
-    for h1 in soup.select("h1"):
-        span = h1.select_one("span.u-text-primary.u-font-normal")
-        if span:
-            motion_type = span.get_text(strip=True)
-            # collect all non-span text inside the h1
-            title_text = "".join(t for t in h1.stripped_strings if t != motion_type and t != ":")
-            all_titles.append({"type": motion_type, "titel": title_text})
-
-    if len(all_titles) != 1:
-        raise ValueError(f"Title missing or not unique for {url}")
-    motie_type, motie_title = all_titles[0]["type"], all_titles[0]["titel"]
-
-    # check for early exits
-    if motie_type.lower().strip() in WETSVOORSTELLEN:
-        # TODO: implement wetsvoorstellen
-        return {
-            "motie_id": motie_id,
-            "motie_did": motie_did,
-            "document_nr": motie_document_nr,
-            "datum": motie_date,
-            "titel": motie_title,
-            "type": motie_type,
-            "text": None,
-            "is_fallback": False,
-            "download": None,
-        }
+def parse_text_from_download(url: str) -> Future:
+    extractor = documents.get_extractor()
+    # an archived run has to keep the file itself
+    if client.get_client().archive is None:
+        cached = extractor.cached(url)
+        if cached is not None:
+            return cached
 
-    # motie pdf url
-    download_tag = soup.select_one('a[aria-label^="Download kamerstuk"]')
-    if download_tag is None:
-        raise ValueError(f"Motie PDF is missing for {url}")
-    motie_download = DOWNLOAD_URL.format(link=download_tag["href"].strip("/"))
-
-    # motion text
-    content = soup.select_one("div.m-modal__content")
-    if content:
-        # normalize whitespace
-        is_fallback = False
-        motie_text = " ".join(t.strip() for t in content.stripped_strings)
-        motie_text = " ".join(motie_text.split())
-    else:
-        # fallback to parsing download
-        is_fallback = True
-        motie_text = parse_text_from_download(url=motie_download)
-
-    return {
-        "motie_id": motie_id,
-        "motie_did": motie_did,
-        "document_nr": motie_document_nr,
-        "datum": motie_date,
-        "titel": motie_title,
-        "type": motie_type,
-        "text": motie_text,
-        "is_fallback": is_fallback,
-        "download": motie_download,
-    }
-
-
-def parse_text_from_download(url: str) -> str:
-    # download the file
-    response = requests.get(url)
+    # download the file, the text is extracted in the document workers
+    response = client.get(url, kind="download", max_size=extractor.max_size)
     response.raise_for_status()
-    file_bytes = BytesIO(response.content)
-
-    # detect file type
-    file_type = magic.from_buffer(file_bytes.getvalue(), mime=True)
-
-    text_parts = []
-    if "wordprocessingml" in file_type:
-        # DOCX parser
-        doc = Document(file_bytes)
-
-        # paragraphs
-        for p in doc.paragraphs:
-            if p.text.strip():
-                text_parts.append(p.text.strip())
-
-        # tables
-        for table in doc.tables:
-            for row in table.rows:
-                for cell in row.cells:
-                    if cell.text.strip():
-                        text_parts.append(cell.text.strip())
-
-    elif file_type == "application/pdf":
-        # PDF parser
-        reader = PdfReader(file_bytes)
-        for page in reader.pages:
-            text = page.extract_text()
-            if text:
-                text_parts.append(text.strip())
-
-    else:
-        raise ValueError(f"Unsupported file type: {file_type}")
-
-    # combine and normalize whitespace
-    motie_text = " ".join(text_parts)
-    motie_text = " ".join(motie_text.split())
-
-    return motie_text
-
-
-EXPECTED_HEADERS = [
-    ["Fracties", "Zetels", "Voor/Tegen"],
-    ["Fracties", "Zetels", "Kamerlid", "Voor/Tegen"],
-]
-
-
-def parse_details_info(url: str, soup: BeautifulSoup) -> list[dict]:
-    rows = soup.select("#votes-details table.h-table-bordered tbody tr")[1:]  # skip header row
-
-    headers = [th.get_text(strip=True) for th in soup.select("#votes-details table thead th")]
-    if not headers:
-        headers = [
-            th.get_text(strip=True)
-            for th in soup.select("#votes-details table tbody tr")[0].find_all(["th", "td"])
-        ]
-
-    if headers[:3] != EXPECTED_HEADERS[0] and headers[:4] != EXPECTED_HEADERS[1]:
-        raise ValueError(f"Unexpected table headers: {headers}")
-
-    current_fractie = None
-    current_zetels = None
-
-    details_info = []
-    for r in rows:
-        cells = r.find_all(["td", "th"])
-
-        if len(cells) == len(headers):
-            # first row of a bloc with rowspan
-            current_fractie = cells[0].get_text(strip=True)
-            current_zetels = int(cells[1].get_text(strip=True))
-            row = {
-                h.lower().replace(" ", "_"): (c.get_text(strip=True) or None)
-                for h, c in zip(headers[2:], cells[2:])
-            }
-        else:
-            # subsequent rows
-            row = {
-                h.lower().replace(" ", "_"): (c.get_text(strip=True) or None)
-                for h, c in zip(headers[2:], cells)
-            }
-
-        details_info.append(
-            {
-                "fractie": current_fractie,
-                "zetels": current_zetels,
-                "kamerlid": row.get("kamerlid"),
-                "stem": row.get("voor/tegen"),
-                "niet_deelgenomen": row.get("niet_deelgenomen"),
-                "vergissing": bool(row.get("vergissing")),
-            }
-        )
-
-    return details_info
-
-
-def parse_indieners_info(url: str, soup: BeautifulSoup) -> list[dict]:
-    indieners = []
-    for li in soup.select("ul.m-list li.m-list__item--variant-member"):
-        # indiener type
-
-        type_span = li.select_one("span.u-font-bold")
-        if type_span is None:
-            raise ValueError(f"Type of (mede)indiener is missing for {url}")
-        type_text = type_span.get_text(strip=True)
-
-        # indiener name
-        label_span = li.select_one("span.m-list__label")
-        if not label_span:
-            raise ValueError(f"2: Name of (mede)indiener is missing for {url}")
-
-        name_link = label_span.select_one("a.h-link-inverse")
-        if name_link:
-            # Try first <a>
-            name_text = name_link.get_text(strip=True)
-        else:
-            # Take the text after the type span
-            texts = [t.strip() for t in label_span.stripped_strings]
-            if len(texts) <= 1:
-                continue
-            full_name = texts[1]
-
-            # Split off descriptor at first comma
-            if "," in full_name:
-                *name_parts, _ = [s.strip() for s in full_name.split(",")]
-                name_text = ", ".join(part.strip() for part in name_parts)
-            else:
-                name_text = full_name
-
-        indieners.append({"type": type_text, "name": name_text})
-
-    if len(indieners) == 0:
-        raise ValueError(f"(Mede)indieners are missing for {url}")
-
-    return indieners
+    return extractor.submit(url, response.content)
 
 
 # UTILS
@@ -581,126 +613,86 @@ def parse_select_argument(arg: str | None) -> list[str] | None:
     return arg.split() if arg is not None else None
 
 
-def create_tables() -> dict[str, pl.DataFrame]:
-    return {
-        "stemming": pl.DataFrame(schema=STEMMING_SCHEMA),
-        "motie": pl.DataFrame(schema=MOTIE_SCHEMA),
-        "indieners": pl.DataFrame(schema=INDIENERS_SCHEMA),
-        "details": pl.DataFrame(schema=DETAILS_SCHEMA),
-    }
-
+def create_tables() -> TableBuilder:
+    return TableBuilder(
+        {
+            "stemming": STEMMING_SCHEMA,
+            "motie": MOTIE_SCHEMA,
+            "indieners": INDIENERS_SCHEMA,
+            "details": DETAILS_SCHEMA,
+        }
+    )
 
-def write_tables(data: dict[str, pl.DataFrame], path: Path):
-    path.mkdir(parents=True, exist_ok=True)
-    for key, table in data.items():
-        table.write_csv(path / f"{key}.csv")
 
+def write_stemming(data: dict[str, pl.DataFrame], output: CsvSink | ParquetSink | PostgresSink):
+    stem_id = data["stemming"]["stemming_id"].item()
+    stem_dt = data["stemming"]["datum"].item()
+    stem_dt = parse_dutch_date_str(stem_dt)
 
-def merge_tables(
-    data_a: dict[str, pl.DataFrame] | None,
-    data_b: dict[str, pl.DataFrame],
-) -> dict[str, pl.DataFrame]:
-    if data_a is None:
-        return data_b
-    output = {}
-    for key in data_a.keys():
-        output[key] = pl.concat([data_a[key], data_b[key]])
-    return output
+    with metrics.timer("write"):
+        output.write(stem_dt, stem_id, data)
 
 
-def read_error() -> pl.DataFrame:
-    file_path = Path(".run") / "errors.csv"
-    if file_path.exists():
-        return pl.read_csv(file_path)
-    else:
-        return pl.DataFrame(schema={"stemming_id": str, "url": str, "error": str})
+_errors = None
+_moties = None
+_output = None
 
 
-def write_error(err_data: pl.DataFrame):
-    file_path = Path(".run") / "errors.csv"
-    file_path.parent.mkdir(parents=True, exist_ok=True)
-    err_data = err_data.unique().sort("stemming_id", "url")
-    err_data.write_csv(file_path)
+def get_moties() -> Memo:
+    global _moties
+    if _moties is None:
+        _moties = Memo()
+    return _moties
 
 
-def add_error(stem_id: str, url: str, err: Exception):
-    err_row = pl.DataFrame(
-        {
-            "stemming_id": stem_id,
-            "url": url,
-            "error": str(err),
-        }
-    )
-    err_data = read_error()
-    err_data = pl.concat([err_data, err_row])
-    write_error(err_data)
+def reset_moties():
+    # created up front, the fetch threads only ever read it
+    global _moties
+    _moties = Memo()
 
 
-def rem_error(stem_id: str, url: str | None = None):
-    err_data = read_error()
-    if url is None:
-        err_data = err_data.filter(
-            pl.col("stemming_id") != stem_id,
-        )
-    else:
-        err_data = err_data.filter(
-            ~((pl.col("stemming_id") == stem_id) & (pl.col("url") == url)),
-        )
-    write_error(err_data)
+def get_errors() -> ErrorLedger:
+    global _errors
+    if _errors is None:
+        _errors = ErrorLedger()
+    return _errors
 
 
-def read_progress() -> dict[str, list]:
-    file_path = Path(".run") / "progress.json"
-    if file_path.exists():
-        with file_path.open(encoding="utf-8") as f:
-            progress = json.load(f)
-    else:
-        progress = {}
-    progress = remove_failed_from_progress(progress)
-    return progress
+def add_error(stem_id: str, url: str, err: Exception):
+    get_errors().add(stem_id=stem_id, url=url, err=str(err))
 
 
-def remove_failed_from_progress(progress: dict[str, list]) -> dict[str, list]:
-    err_data = read_error()
-    err_ids = err_data["stemming_id"].to_list()
+def rem_error(stem_id: str, url: str | None = None):
+    get_errors().remove(stem_id=stem_id, url=url)
 
-    result = {}
-    for date, ids in progress.items():
-        result[date] = [i for i in ids if i not in err_ids]
 
-    return result
+def flush_errors():
+    get_errors().flush()
 
 
-def write_progress(progress: dict[str, list]):
-    file_path = Path(".run") / "progress.json"
-    file_path.parent.mkdir(parents=True, exist_ok=True)
-    with open(file_path, "w", encoding="utf-8") as f:
-        json.dump(progress, f, indent=2, ensure_ascii=False)
+def read_progress() -> ProgressStore:
+    return ProgressStore(exclude=get_errors().stemming_ids())
 
 
 def rebuild_progress(data_path: str):
     data_path = Path(data_path)
-    file_path = Path(".run") / "progress.json"
 
-    res = {}
+    res = set()
     for folder in data_path.iterdir():
         if not folder.is_dir():
             continue
-        key = folder.name
-        res[key] = set()
         for subfolder in folder.iterdir():
             if not subfolder.is_dir():
                 continue
-            res[key].add(subfolder.name)
-        res[key] = list(res[key])
-    write_progress(res)
+            res.add((folder.name, subfolder.name))
+    ProgressStore().replace(res)
 
 
-def already_processed(progress: dict[str, list], stem_dt: str, stem_id: str) -> bool:
-    return stem_dt in progress and stem_id in progress[stem_dt]
+def already_processed(progress: ProgressStore, stem_dt: str, stem_id: str) -> bool:
+    return (stem_dt, stem_id) in progress
 
 
-def parse_dutch_date_str(date: str) -> str:
-    date = parse_date(date, languages=["nl"])
-    date = date.strftime("%Y-%m-%d")
-    return date
+def is_settled(progress: ProgressStore, card: dict, settled_before: date) -> bool:
+    return already_processed(progress, card["stem_dt"], card["stem_id"]) and (
+        date.fromisoformat(card["stem_dt"]) < settled_before
+    )
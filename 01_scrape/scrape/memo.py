@@ -0,0 +1,58 @@
+import threading
+from collections import OrderedDict
+from collections.abc import Callable
+from concurrent.futures import Future
+
+DEFAULT_MAX_ENTRIES = 4096
+
+
+class Memo:
+    """Results by key, computed once even when several threads ask for the same key at once.
+
+    The first caller computes the result, concurrent callers for the same key wait for it. Failures
+    are not kept, so the next caller tries again; a result that turns out to have failed later
+    can be dropped with `forget`. The least recently used results are dropped beyond
+    `max_entries`.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.futures: OrderedDict[str, Future] = OrderedDict()
+        self.hits = 0
+
+    def get(self, key: str, func: Callable, *args, **kwargs):
+        with self.lock:
+            future = self.futures.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self.futures[key] = future
+                while len(self.futures) > self.max_entries:
+                    self.futures.popitem(last=False)
+            else:
+                self.futures.move_to_end(key)
+                self.hits += 1
+
+        if not owner:
+            return future.result()
+
+        try:
+            result = func(*args, **kwargs)
+        except BaseException as err:
+            with self.lock:
+                if self.futures.get(key) is future:
+                    del self.futures[key]
+            future.set_exception(err)
+            raise
+        future.set_result(result)
+        return result
+
+    def forget(self, key: str, result):
+        # only while the key still holds this result, a newer one is kept
+        with self.lock:
+            future = self.futures.get(key)
+            if future is None or not future.done() or future.exception() is not None:
+                return
+            if future.result() is result:
+                del self.futures[key]
@@ -0,0 +1,252 @@
+import cProfile
+import json
+import os
+import pstats
+import threading
+import time
+from bisect import bisect_left
+from collections.abc import Iterator
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+METRICS_PATH = Path(".run") / "metrics.json"
+PROFILE_PATH = Path(".run") / "profile.pstats"
+
+# metric names in the Prometheus textfile
+PREFIX = "scrape_"
+
+# upper bounds in seconds, from a cached page to a document that hits its timeout
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class Histogram:
+    """Latencies counted per bucket, as in a Prometheus histogram."""
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float):
+        self.counts[bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        self.max = max(self.max, seconds)
+
+    def merge(self, other: "Histogram"):
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.sum += other.sum
+        self.max = max(self.max, other.max)
+
+    def quantile(self, q: float) -> float:
+        # the upper bound of the bucket the quantile falls in, or the maximum for the last one
+        seen = 0
+        for bound, count in zip(BUCKETS, self.counts):
+            seen += count
+            if seen >= q * self.count:
+                return min(bound, self.max)
+        return self.max
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "mean": round(self.sum / self.count, 6) if self.count else 0.0,
+            "p50": self.quantile(0.5),
+            "p90": self.quantile(0.9),
+            "p99": self.quantile(0.99),
+            "max": round(self.max, 6),
+        }
+
+
+class Metrics:
+    """Counters and latency histograms of a run, by name and labels.
+
+    Shared by the fetch threads, so every update takes the lock. Shard processes send theirs to
+    the parent, which merges them into its own.
+    """
+
+    def __init__(self):
+        self.started = time.time()
+        self.counters = {}
+        self.histograms = {}
+        self.lock = threading.Lock()
+
+    def __getstate__(self) -> dict:
+        return {key: value for key, value in self.__dict__.items() if key != "lock"}
+
+    def __setstate__(self, state: dict):
+        self.__dict__.update(state)
+        self.lock = threading.Lock()
+
+    def count(self, name: str, value: float = 1, **labels):
+        key = metric_key(name, labels)
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name: str, seconds: float, **labels):
+        key = metric_key(name, labels)
+        with self.lock:
+            if key not in self.histograms:
+                self.histograms[key] = Histogram()
+            self.histograms[key].observe(seconds)
+
+    @contextmanager
+    def timer(self, stage: str, **labels) -> Iterator[None]:
+        start = time.monotonic()
+        try:
+            yield
+        except BaseException:
+            self.count("stage_errors_total", stage=stage, **labels)
+            raise
+        finally:
+            self.observe("stage_seconds", time.monotonic() - start, stage=stage, **labels)
+
+    def merge(self, other: "Metrics"):
+        with self.lock:
+            self.started = min(self.started, other.started)
+            for key, value in other.counters.items():
+                self.counters[key] = self.counters.get(key, 0) + value
+            for key, histogram in other.histograms.items():
+                if key not in self.histograms:
+                    self.histograms[key] = Histogram()
+                self.histograms[key].merge(histogram)
+
+    def summary(self) -> dict:
+        with self.lock:
+            return {
+                "started": datetime.fromtimestamp(self.started).isoformat(timespec="seconds"),
+                "elapsed": round(time.time() - self.started, 3),
+                "counters": [
+                    {"name": name, "labels": dict(labels), "value": value}
+                    for (name, labels), value in sorted(self.counters.items())
+                ],
+                "histograms": [
+                    {"name": name, "labels": dict(labels), **histogram.summary()}
+                    for (name, labels), histogram in sorted(self.histograms.items())
+                ],
+            }
+
+    def write_json(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        write_atomic(path, json.dumps(self.summary(), indent=2) + "\n")
+
+    def write_prometheus(self, path: Path):
+        lines = []
+        with self.lock:
+            elapsed = time.time() - self.started
+            lines += [f"# TYPE {PREFIX}run_seconds gauge", f"{PREFIX}run_seconds {elapsed:.3f}"]
+            lines += [
+                f"# TYPE {PREFIX}last_run_timestamp_seconds gauge",
+                f"{PREFIX}last_run_timestamp_seconds {time.time():.0f}",
+            ]
+
+            for name in sorted({name for name, _ in self.counters}):
+                lines.append(f"# TYPE {PREFIX}{name} counter")
+                for (key, labels), value in sorted(self.counters.items()):
+                    if key == name:
+                        lines.append(f"{PREFIX}{name}{format_labels(labels)} {value}")
+
+            for name in sorted({name for name, _ in self.histograms}):
+                lines.append(f"# TYPE {PREFIX}{name} histogram")
+                for (key, labels), histogram in sorted(self.histograms.items()):
+                    if key != name:
+                        continue
+                    seen = 0
+                    for bound, count in zip(BUCKETS, histogram.counts):
+                        seen += count
+                        bucket = format_labels(labels + (("le", str(bound)),))
+                        lines.append(f"{PREFIX}{name}_bucket{bucket} {seen}")
+                    bucket = format_labels(labels + (("le", "+Inf"),))
+                    lines.append(f"{PREFIX}{name}_bucket{bucket} {histogram.count}")
+                    lines.append(f"{PREFIX}{name}_sum{format_labels(labels)} {histogram.sum:.6f}")
+                    lines.append(f"{PREFIX}{name}_count{format_labels(labels)} {histogram.count}")
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        write_atomic(path, "\n".join(lines) + "\n")
+
+    def print_stages(self):
+        with self.lock:
+            stages = [
+                (" ".join([dict(labels)["stage"], *(v for k, v in labels if k != "stage")]), hist)
+                for (name, labels), hist in self.histograms.items()
+                if name == "stage_seconds"
+            ]
+        for stage, histogram in sorted(stages, key=lambda item: item[0]):
+            print(
+                f"  {stage:18s} {histogram.count:6d}x"
+                f"  mean {histogram.sum / histogram.count * 1000:8.1f} ms"
+                f"  p99 {histogram.quantile(0.99) * 1000:8.1f} ms"
+                f"  total {histogram.sum:8.1f} s"
+            )
+
+
+def metric_key(name: str, labels: dict) -> tuple[str, tuple]:
+    # label values as strings, so keys with e.g. status 200 and status "error" still sort
+    return name, tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def format_labels(labels: tuple) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{escape(value)}"' for key, value in labels) + "}"
+
+
+def escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def write_atomic(path: Path, text: str):
+    # textfile collectors may read the file at any moment, so never show a partial one
+    tmp = path.with_name(f".{path.name}.tmp")
+    tmp.write_text(text, encoding="utf-8")
+    os.replace(tmp, path)
+
+
+@contextmanager
+def profiled(path: Path = PROFILE_PATH, top: int = 30) -> Iterator[None]:
+    # since Python 3.12 the profiler sees every thread, but not the document worker processes
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        profiler.dump_stats(path)
+        pstats.Stats(profiler).sort_stats("cumulative").print_stats(top)
+        print(f"Saved the profile to {path}")
+
+
+_metrics = None
+_lock = threading.Lock()
+
+
+def configure() -> Metrics:
+    global _metrics
+    with _lock:
+        _metrics = Metrics()
+    return _metrics
+
+
+def get_metrics() -> Metrics:
+    global _metrics
+    with _lock:
+        if _metrics is None:
+            _metrics = Metrics()
+    return _metrics
+
+
+def count(name: str, value: float = 1, **labels):
+    get_metrics().count(name, value, **labels)
+
+
+def observe(name: str, seconds: float, **labels):
+    get_metrics().observe(name, seconds, **labels)
+
+
+def timer(stage: str, **labels):
+    return get_metrics().timer(stage, **labels)
@@ -0,0 +1,58 @@
+import queue
+import threading
+from collections.abc import Iterator
+
+DEFAULT_PREFETCH = 2
+
+# how often a blocked producer checks whether the consumer is gone
+POLL_INTERVAL = 0.1
+
+_DONE = object()
+
+
+class Failure:
+    def __init__(self, err: BaseException):
+        self.err = err
+
+
+def prefetch(items: Iterator, size: int = DEFAULT_PREFETCH) -> Iterator:
+    """Iterates `items` in a background thread, at most `size` items ahead of the consumer.
+
+    An exception in the producer is raised in the consumer once it reaches that point. When the
+    consumer stops early, the producer stops as well.
+    """
+    buffer = queue.Queue(maxsize=max(size, 1))
+    stop = threading.Event()
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                buffer.put(item, timeout=POLL_INTERVAL)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for item in items:
+                if not put(item):
+                    return
+        except BaseException as err:
+            put(Failure(err))
+            return
+        put(_DONE)
+
+    thread = threading.Thread(target=produce, daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = buffer.get()
+            if item is _DONE:
+                return
+            if isinstance(item, Failure):
+                raise item.err
+            yield item
+    finally:
+        stop.set()
+        thread.join()
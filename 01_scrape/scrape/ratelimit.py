@@ -0,0 +1,150 @@
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+import requests
+
+# responses that mean the site wants us to slow down
+THROTTLE_STATUSES = [429, 503]
+
+DEFAULT_RATE = 2.0
+DEFAULT_MAX_RATE = 20.0
+DEFAULT_DOWNLOAD_RATE = 1.0
+DEFAULT_MAX_DOWNLOAD_RATE = 5.0
+DEFAULT_MAX_IN_FLIGHT = 10
+
+# responses slower than this count as a sign of load, like a throttled one
+TARGET_LATENCY = 2.0
+
+# additive increase of about one request per second, every second without trouble
+INCREASE = 1.0
+DECREASE = 0.5
+SLOW_DECREASE = 0.8
+
+# one decrease per interval, the other responses of a burst were already in flight
+DECREASE_INTERVAL = 1.0
+
+MIN_RATE = 0.1
+BACKOFF = 1.0
+MAX_BACKOFF = 300.0
+
+
+class Budget:
+    """Paces requests and limits how many are in flight, adapting both AIMD style.
+
+    Until the first sign of trouble every good response raises the rate and the in-flight limit
+    by one (slow start), after that only by a little. Throttled, failed or slow responses cut them
+    by a factor, and throttled ones pause all requests for the `Retry-After` of the response, or
+    an exponential backoff without one.
+    """
+
+    def __init__(self, name: str, rate: float, max_rate: float, max_in_flight: int):
+        self.name = name
+        self.max_rate = max_rate
+        self.rate = min(rate, max_rate)
+        self.max_in_flight = max_in_flight
+        self.limit = 1.0
+        self.in_flight = 0
+        self.next_at = 0.0
+        self.blocked_until = 0.0
+        self.decreased_at = 0.0
+        self.strikes = 0
+        self.throttled = 0
+        self.slow_start = True
+        self.cond = threading.Condition()
+
+    def acquire(self):
+        with self.cond:
+            while True:
+                now = time.monotonic()
+                wait = max(self.blocked_until, self.next_at) - now
+                if wait <= 0 and self.in_flight < int(self.limit):
+                    self.in_flight += 1
+                    self.next_at = max(now, self.next_at) + 1 / self.rate
+                    return
+                self.cond.wait(timeout=wait if wait > 0 else None)
+
+    def release(self, status: int | None, latency: float, retry_after: float | None = None):
+        with self.cond:
+            self.in_flight -= 1
+            now = time.monotonic()
+
+            if status is None or status in THROTTLE_STATUSES:
+                self.throttled += 1
+                self.strikes += 1
+                backoff = min(BACKOFF * 2 ** (self.strikes - 1), MAX_BACKOFF)
+                pause = min(retry_after, MAX_BACKOFF) if retry_after is not None else backoff
+                self.blocked_until = max(self.blocked_until, now + pause)
+                self.decrease(now, DECREASE)
+            elif latency > TARGET_LATENCY:
+                self.decrease(now, SLOW_DECREASE)
+            else:
+                self.strikes = 0
+                if self.slow_start:
+                    self.rate = min(self.max_rate, self.rate + INCREASE)
+                    self.limit = min(self.max_in_flight, self.limit + 1)
+                else:
+                    self.rate = min(self.max_rate, self.rate + INCREASE / self.rate)
+                    self.limit = min(self.max_in_flight, self.limit + 1 / self.limit)
+
+            self.cond.notify_all()
+
+    def decrease(self, now: float, factor: float):
+        self.slow_start = False
+        if now - self.decreased_at < DECREASE_INTERVAL:
+            return
+        self.decreased_at = now
+        self.rate = max(MIN_RATE, self.rate * factor)
+        self.limit = max(1.0, self.limit * factor)
+
+    def status(self) -> str:
+        with self.cond:
+            text = f"{self.name} {self.rate:.1f}/s, {self.in_flight}/{int(self.limit)} in flight"
+            backoff = self.blocked_until - time.monotonic()
+            if backoff > 0:
+                text += f", backing off {backoff:.0f}s"
+            if self.throttled:
+                text += f", throttled {self.throttled}x"
+        return text
+
+
+class RateLimiter:
+    """Separate budgets for HTML pages and kamerstuk downloads."""
+
+    def __init__(
+        self,
+        rate: float = DEFAULT_RATE,
+        max_rate: float = DEFAULT_MAX_RATE,
+        download_rate: float = DEFAULT_DOWNLOAD_RATE,
+        max_download_rate: float = DEFAULT_MAX_DOWNLOAD_RATE,
+        max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+    ):
+        self.budgets = {
+            "html": Budget("html", rate, max_rate, max_in_flight),
+            "download": Budget("download", download_rate, max_download_rate, max_in_flight),
+        }
+
+    def budget(self, kind: str) -> Budget:
+        return self.budgets["download" if kind == "download" else "html"]
+
+    def status(self) -> str:
+        return "; ".join(budget.status() for budget in self.budgets.values())
+
+
+def retry_after(resp: requests.Response) -> float | None:
+    # either a number of seconds or an HTTP date
+    value = resp.headers.get("Retry-After")
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        moment = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return max(0.0, (moment - datetime.now(timezone.utc)).total_seconds())
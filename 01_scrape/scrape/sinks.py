@@ -0,0 +1,305 @@
+import io
+import os
+import time
+from pathlib import Path
+
+import polars as pl
+
+from scrape.dates import dutch_date_expr
+
+# low-cardinality columns that are stored dictionary encoded
+CATEGORICAL_COLUMNS = ["fractie", "kamerlid", "stem"]
+
+DEFAULT_BUFFER_ROWS = 250_000
+
+# the connection settings of the loader, next to this project in the repo
+POSTGRES_ENV_PATH = Path(__file__).resolve().parents[2] / "02_load" / "default.env"
+
+# FK order, parents first
+POSTGRES_TABLES = ["stemming", "motie", "indieners", "details"]
+
+
+class CsvSink:
+    """Writes every stemming to its own <date>/<stemming_id> folder of CSV files."""
+
+    def __init__(self, output_dir: str):
+        self.output_dir = Path(output_dir)
+
+    def write(self, stem_dt: str, stem_id: str, data: dict[str, pl.DataFrame]):
+        write_tables(data, self.output_dir / stem_dt / stem_id)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class ParquetSink:
+    """Writes a Hive-partitioned Parquet dataset, <table>/year=YYYY/month=MM/part-*.parquet.
+
+    Stemmingen are buffered per partition and written as one part file per table and flush, all
+    with the same name. A stemming that was written in more than one flush only keeps the rows of
+    its latest flush, also in tables where that flush has no rows for it. On close the small part
+    files of every partition are compacted into one.
+    """
+
+    def __init__(
+        self,
+        output_dir: str,
+        compact: bool = True,
+        buffer_rows: int = DEFAULT_BUFFER_ROWS,
+    ):
+        self.output_dir = Path(output_dir)
+        self.compact = compact
+        self.buffer_rows = buffer_rows
+        self.buffer = {}
+        self.buffered = 0
+
+    def write(self, stem_dt: str, stem_id: str, data: dict[str, pl.DataFrame]):
+        year, month, _ = stem_dt.split("-")
+        self.buffer.setdefault((year, month), []).append(data)
+        self.buffered += sum(len(table) for table in data.values())
+        if self.buffered >= self.buffer_rows:
+            self.flush()
+
+    def flush(self):
+        # one name for the parts of all tables, so they can be matched to the stemming table
+        name = part_name()
+        for (year, month), items in self.buffer.items():
+            for key in items[0]:
+                table = pl.concat([data[key] for data in items])
+                if len(table) == 0:
+                    continue
+                path = self.output_dir / key / f"year={year}" / f"month={month}"
+                write_parquet(encode_table(table), path / name)
+        self.buffer = {}
+        self.buffered = 0
+
+    def close(self):
+        self.flush()
+        if self.compact:
+            compact_parquet(self.output_dir)
+
+
+class PostgresSink:
+    """Streams every stemming straight into the database of 02_load, in one transaction each.
+
+    The rows of a stemming that was loaded before are replaced, so the database always has its
+    latest scrape. Tables are written with COPY in FK order. Key columns with a column default
+    go through a staging table, where missing keys get that default as in the CSV loader.
+    Connection settings are the POSTGRES_* variables of `env_file`.
+    """
+
+    def __init__(self, output_dir: str, env_file: str | Path = POSTGRES_ENV_PATH):
+        # only this sink needs a database driver
+        try:
+            import psycopg2
+        except ImportError:
+            raise ValueError("The postgres sink needs psycopg2, run `uv sync --extra postgres`")
+
+        # like the loader, values in the env file win over the environment
+        settings = {**os.environ, **read_env(Path(env_file))}
+        self.conn = psycopg2.connect(
+            dbname=settings.get("POSTGRES_DB"),
+            user=settings.get("POSTGRES_USER"),
+            password=settings.get("POSTGRES_PASSWORD"),
+            host=settings.get("POSTGRES_HOST"),
+            port=settings.get("POSTGRES_PORT"),
+        )
+        self.defaults = self.key_defaults()
+
+    def key_defaults(self) -> dict[str, dict[str, str]]:
+        with self.conn, self.conn.cursor() as cur:
+            cur.execute(
+                """
+                SELECT table_name, column_name, column_default
+                FROM information_schema.columns
+                WHERE table_name = ANY(%s)
+                  AND column_default IS NOT NULL
+                  AND is_nullable = 'NO'
+                """,
+                (POSTGRES_TABLES,),
+            )
+            defaults = {}
+            for table_name, col, default in cur.fetchall():
+                defaults.setdefault(table_name, {})[col] = default
+        return defaults
+
+    def write(self, stem_dt: str, stem_id: str, data: dict[str, pl.DataFrame]):
+        with self.conn, self.conn.cursor() as cur:
+            cur.execute("SELECT 1 FROM stemming WHERE stemming_id = %s", (stem_id,))
+            if cur.fetchone() is not None:
+                delete_stemming(cur, stem_id)
+            for table_name in POSTGRES_TABLES:
+                self.copy(cur, table_name, convert_dates(data[table_name]))
+
+    def copy(self, cur, table_name: str, table: pl.DataFrame):
+        if len(table) == 0:
+            return
+        cols = ",".join(table.columns)
+        buffer = io.StringIO()
+        table.write_csv(buffer)
+        buffer.seek(0)
+
+        defaults = self.defaults.get(table_name, {})
+        if not defaults.keys() & set(table.columns):
+            cur.copy_expert(
+                f"COPY {table_name} ({cols}) FROM STDIN WITH (FORMAT csv, HEADER true)", buffer
+            )
+            return
+
+        staging = f"staging_{table_name}"
+        cur.execute(
+            f"CREATE TEMP TABLE IF NOT EXISTS {staging} ON COMMIT DELETE ROWS "
+            f"AS SELECT * FROM {table_name} WITH NO DATA"
+        )
+        cur.copy_expert(
+            f"COPY {staging} ({cols}) FROM STDIN WITH (FORMAT csv, HEADER true)", buffer
+        )
+        values = ",".join(
+            f"COALESCE({col}, {defaults[col]})" if col in defaults else col for col in table.columns
+        )
+        cur.execute(f"INSERT INTO {table_name} ({cols}) SELECT {values} FROM {staging}")
+
+    def flush(self):
+        # every write commits on its own, the connection stays open for the next stemming
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+
+SINKS = {
+    "csv": CsvSink,
+    "parquet": ParquetSink,
+    "postgres": PostgresSink,
+}
+
+
+def make_sink(
+    kind: str, output_dir: str, compact: bool = True, **kwargs
+) -> CsvSink | ParquetSink | PostgresSink:
+    if kind not in SINKS:
+        raise ValueError(f"Unknown sink {kind}, choose from {', '.join(SINKS)}")
+    # only a Parquet dataset has part files to compact
+    if kind == "parquet":
+        kwargs["compact"] = compact
+    return SINKS[kind](output_dir, **kwargs)
+
+
+def write_tables(data: dict[str, pl.DataFrame], path: Path):
+    path.mkdir(parents=True, exist_ok=True)
+    for key, table in data.items():
+        table.write_csv(path / f"{key}.csv")
+
+
+def delete_stemming(cur, stem_id: str):
+    # children first, so no FK points to a deleted row; they are found through their motie, as
+    # their keys start with motie_id
+    for table_name in reversed(POSTGRES_TABLES[2:]):
+        cur.execute(
+            f"DELETE FROM {table_name} t USING motie m "
+            "WHERE m.stemming_id = %s "
+            "AND t.motie_id = m.motie_id AND t.stemming_id = m.stemming_id",
+            (stem_id,),
+        )
+    cur.execute("DELETE FROM motie WHERE stemming_id = %s", (stem_id,))
+    cur.execute("DELETE FROM stemming WHERE stemming_id = %s", (stem_id,))
+
+
+def read_env(path: Path) -> dict[str, str]:
+    # KEY=VALUE lines, as python-dotenv reads default.env for the loader
+    if not path.exists():
+        return {}
+    settings = {}
+    for line in path.read_text(encoding="utf-8").splitlines():
+        line = line.strip()
+        if not line or line.startswith("#") or "=" not in line:
+            continue
+        key, value = line.removeprefix("export ").split("=", 1)
+        settings[key.strip()] = value.strip().strip("'\"")
+    return settings
+
+
+def convert_dates(table: pl.DataFrame) -> pl.DataFrame:
+    # the Dutch dates as DATE values, the same columns as the loader converts
+    return table.with_columns(
+        dutch_date_expr(col) for col in table.columns if "datum" in col or "date" in col
+    )
+
+
+def encode_table(table: pl.DataFrame) -> pl.DataFrame:
+    return table.with_columns(
+        pl.col(col).cast(pl.Categorical) for col in CATEGORICAL_COLUMNS if col in table.columns
+    )
+
+
+def write_parquet(table: pl.DataFrame, file_path: Path):
+    # write next to the target and rename, so readers never see half a file
+    file_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = file_path.with_suffix(".tmp")
+    table.write_parquet(tmp_path, compression="zstd", statistics=True)
+    tmp_path.replace(file_path)
+
+
+def part_name() -> str:
+    # sorts by write time, which compaction relies on
+    return f"part-{time.time_ns():020d}-{os.getpid()}.parquet"
+
+
+def compact_parquet(output_dir: str | Path):
+    output_dir = Path(output_dir)
+    files = list(output_dir.glob("*/year=*/month=*/part-*.parquet"))
+    tables = sorted({file.parents[2].name for file in files})
+    for partition in sorted({file.parent.relative_to(file.parents[2]) for file in files}):
+        parts = {
+            table: sorted((output_dir / table / partition).glob("part-*.parquet"))
+            for table in tables
+        }
+        if all(len(table_parts) <= 1 for table_parts in parts.values()):
+            continue
+
+        # a stemming that was written in more than one flush only keeps the rows of the latest,
+        # in every table, so rows that flush did not have anymore are dropped as well
+        flushes = stemming_flushes(parts.get("stemming", []))
+        name = part_name()
+        for table_name, table_parts in parts.items():
+            if not table_parts:
+                continue
+            table = pl.concat(
+                [
+                    pl.read_parquet(part).with_columns(pl.lit(part.name).alias("part"))
+                    for part in table_parts
+                ],
+                how="vertical_relaxed",
+            )
+            table = (
+                table.join(flushes, on="stemming_id")
+                .filter((pl.col("flushes") == 1) | (pl.col("part") == pl.col("latest")))
+                .drop("part", "latest", "flushes")
+            )
+            if len(table) > 0:
+                write_parquet(encode_table(table), output_dir / table_name / partition / name)
+            for part in table_parts:
+                part.unlink()
+
+
+def stemming_flushes(stemming_parts: list[Path]) -> pl.DataFrame:
+    # every flush writes the stemming table, so its parts are the flushes of every stemming
+    if not stemming_parts:
+        return pl.DataFrame(
+            schema={"stemming_id": pl.String, "latest": pl.String, "flushes": pl.UInt32}
+        )
+    return (
+        pl.concat(
+            [
+                pl.read_parquet(part, columns=["stemming_id"]).with_columns(
+                    pl.lit(part.name).alias("part")
+                )
+                for part in stemming_parts
+            ]
+        )
+        .group_by("stemming_id")
+        .agg(pl.col("part").max().alias("latest"), pl.col("part").n_unique().alias("flushes"))
+    )
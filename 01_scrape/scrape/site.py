@@ -0,0 +1,29 @@
+SITE_URL = "https://www.tweedekamer.nl/"
+
+STEMMINGSUITSLAGEN_URL = (
+    SITE_URL + "kamerstukken/stemmingsuitslagen"
+    "?qry=%2A&fld_tk_categorie=Kamerstukken&fld_prl_kamerstuk=Stemmingsuitslagen"
+    "&fromdate={from_date}&todate={to_date}"
+    "&srt=date%3Adesc%3Adate&page={page}"
+)
+DEBAT_URL = SITE_URL + "{link}"
+MOTIE_URL = SITE_URL + "{link}"
+DOWNLOAD_URL = SITE_URL + "{link}"
+
+WETSVOORSTELLEN = [
+    "wetsvoorstel",
+    "voorstel van wet",
+    "voorstel van wet (initiatiefvoorstel)",
+    "eindtekst",
+]
+
+GEEN_INDIENERS = [
+    *WETSVOORSTELLEN,
+    "advies afdeling advisering raad van state",
+    "memorie van toelichting",
+]
+
+EXPECTED_HEADERS = [
+    ["Fracties", "Zetels", "Voor/Tegen"],
+    ["Fracties", "Zetels", "Kamerlid", "Voor/Tegen"],
+]
@@ -0,0 +1,302 @@
+import re
+
+from bs4 import BeautifulSoup
+
+from scrape.dates import parse_dutch_date_str
+from scrape.site import DOWNLOAD_URL, EXPECTED_HEADERS, WETSVOORSTELLEN
+
+
+def parse_html(content: bytes) -> BeautifulSoup:
+    return BeautifulSoup(content, "lxml")
+
+
+def parse_listing_cards(url: str, soup: BeautifulSoup) -> list[dict]:
+    cards = []
+    for card in soup.select("div.m-card, div.u-mt-6.m-card"):
+        a_tag = card.select_one("h4.u-mt-0 > a")
+        if a_tag:
+            link = a_tag["href"]
+
+        time_tag = card.select_one("time.u-text-primary")
+        if time_tag:
+            stem_dt = time_tag.get_text(strip=True)
+            stem_dt = parse_dutch_date_str(stem_dt)
+
+        id_tag = card.select_one("p.u-text-dark-gray")
+        if id_tag:
+            stem_id = id_tag.get_text(strip=True)
+
+        cards.append(
+            {
+                "link": link,
+                "stem_dt": stem_dt,
+                "stem_id": stem_id,
+            }
+        )
+
+    if len(cards) == 0:
+        raise ValueError(f"No links found for {url}")
+
+    return cards
+
+
+def parse_stemming_page_info(url: str, soup: BeautifulSoup) -> dict:
+    # stemming id & did
+    match = re.search(r"id=([^&]+)&(?:did|dossier)=([^&]+)", url)
+    if not match:
+        raise ValueError(f"ID and DID missing from motion for {url}")
+    stemming_id = match.group(1)
+    stemming_did = match.group(2)
+
+    # stemming title
+    meta_tag = soup.select_one('meta[name="dcterms.title"]')
+    if meta_tag is None:
+        ValueError(f"Stemming title is missing for {url}")
+    stemming_title = meta_tag["content"]
+
+    # stemming type & date
+    h2_tags = soup.select("h2")
+    if len(h2_tags) != 1:
+        raise ValueError(f"Stemming subtitle is missing or not unique for {url}")
+
+    for h2 in h2_tags:
+        span = h2.select_one("span.u-font-normal")
+        if span is None:
+            raise ValueError(f"Stemming date is missing for {url}")
+        stemming_date = span.get_text(strip=True)
+
+        # The meeting type is everything in h2 minus the span
+        stemming_type = h2.contents[0].strip() if h2.contents else None
+        if type is None:
+            raise ValueError(f"Stemming type is missing for {url}")
+
+    return {
+        "stemming_id": stemming_id,
+        "stemming_did": stemming_did,
+        "titel": stemming_title,
+        "datum": stemming_date,
+        "type": stemming_type,
+    }
+
+
+def parse_motion_cards(url: str, soup: BeautifulSoup) -> list[tuple[str, str]]:
+    motions = []
+    for k, card in enumerate(soup.select("div.m-card")):
+        # Find the main motion link
+        link_tag = card.select_one("h3.m-card__title > a")
+        if link_tag is None:
+            raise ValueError(f"Cannot find link of motion {k} for {url}")
+        link = link_tag["href"]
+
+        # Find the paragraph with "Besluit"
+        besluit_tag = None
+        for p in card.select("p.u-mt-8"):
+            if "Besluit" in p.get_text():
+                besluit_tag = p.select_one("span.u-font-bold")
+                break
+        if besluit_tag is None:
+            raise ValueError(f"Cannot find decision of motion {k} for {url}")
+        besluit = besluit_tag.get_text(strip=True).strip(".")
+
+        motions.append((link, besluit))
+
+    return motions
+
+
+def parse_motie_info(url: str, soup: BeautifulSoup) -> dict:
+    # motie id & did
+    match = re.search(r"id=([^&]+)&(?:did|dossier)=([^&]+)", url)
+    if not match:
+        raise ValueError(f"ID and DID missing from motion for {url}")
+    motie_id = match.group(1)
+    motie_did = match.group(2)
+
+    # motie document nr
+    doc_nr_spans = soup.select("span.h-visually-hidden")
+    all_doc_nrs = [
+        span.next_sibling.strip() for span in doc_nr_spans if "Nummer:" in span.get_text()
+    ]
+    if len(all_doc_nrs) != 1:
+        raise ValueError(f"Document nr missing or not unique for {url}")
+    motie_document_nr = all_doc_nrs[0]
+
+    # motie date
+    date_spans = soup.select("span.h-visually-hidden")
+    all_dates = [span.next_sibling.strip() for span in date_spans if "Datum:" in span.get_text()]
+    if len(all_dates) != 1:
+        raise ValueError(f"Date missing or not unique for {url}")
+    motie_date = all_dates[0]
+
+    # motion type & title
+    all_titles = []
+    for h1 in soup.select("h1"):
+        span = h1.select_one("span.u-text-primary.u-font-normal")
+        if span:
+            motion_type = span.get_text(strip=True)
+            # collect all non-span text inside the h1
+            title_text = "".join(t for t in h1.stripped_strings if t != motion_type and t != ":")
+            all_titles.append({"type": motion_type, "titel": title_text})
+
+    if len(all_titles) != 1:
+        raise ValueError(f"Title missing or not unique for {url}")
+    motie_type, motie_title = all_titles[0]["type"], all_titles[0]["titel"]
+
+    # check for early exits
+    if motie_type.lower().strip() in WETSVOORSTELLEN:
+        # TODO: implement wetsvoorstellen
+        return {
+            "motie_id": motie_id,
+            "motie_did": motie_did,
+            "document_nr": motie_document_nr,
+            "datum": motie_date,
+            "titel": motie_title,
+            "type": motie_type,
+            "text": None,
+            "is_fallback": False,
+            "download": None,
+        }
+
+    # motie pdf url
+    download_tag = soup.select_one('a[aria-label^="Download kamerstuk"]')
+    if download_tag is None:
+        raise ValueError(f"Motie PDF is missing for {url}")
+    motie_download = DOWNLOAD_URL.format(link=download_tag["href"].strip("/"))
+
+    # motion text
+    content = soup.select_one("div.m-modal__content")
+    if content:
+        # normalize whitespace
+        is_fallback = False
+        motie_text = " ".join(t.strip() for t in content.stripped_strings)
+        motie_text = " ".join(motie_text.split())
+    else:
+        # fallback to parsing download, see parse_motie_page
+        is_fallback = True
+        motie_text = None
+
+    return {
+        "motie_id": motie_id,
+        "motie_did": motie_did,
+        "document_nr": motie_document_nr,
+        "datum": motie_date,
+        "titel": motie_title,
+        "type": motie_type,
+        "text": motie_text,
+        "is_fallback": is_fallback,
+        "download": motie_download,
+    }
+
+
+def parse_uitslag_info(url: str, soup: BeautifulSoup) -> dict | None:
+    h2 = soup.find("h2", string=lambda t: t and "Stemmingsuitslagen" in t)
+    if h2 is None:
+        return None
+
+    # motie uitslag text
+    h3 = h2.find_next("h3")
+    if h3 is None:
+        raise ValueError(f"Uitslag is missing from stemmingsuitslagen for {url}")
+    uitslag = h3.get_text(strip=True)
+
+    # motie uitslag counts
+
+    # Voor
+    vote_result = soup.select_one("div.m-vote-result__bar")
+    voor = int(vote_result.get("data-vote-result", "0") or "0")
+
+    # Vereist & Totaal: inside hidden spans
+    labels = soup.select("div.m-vote-result__label")
+    vereist = int(labels[1].find("span").get_text(strip=True).split(": ")[1])
+    totaal = int(labels[2].find("span").get_text(strip=True).split(": ")[1])
+
+    return {"uitslag": uitslag, "voor": voor, "vereist": vereist, "totaal": totaal}
+
+
+def parse_details_info(url: str, soup: BeautifulSoup) -> list[dict]:
+    rows = soup.select("#votes-details table.h-table-bordered tbody tr")[1:]  # skip header row
+
+    headers = [th.get_text(strip=True) for th in soup.select("#votes-details table thead th")]
+    if not headers:
+        headers = [
+            th.get_text(strip=True)
+            for th in soup.select("#votes-details table tbody tr")[0].find_all(["th", "td"])
+        ]
+
+    if headers[:3] != EXPECTED_HEADERS[0] and headers[:4] != EXPECTED_HEADERS[1]:
+        raise ValueError(f"Unexpected table headers: {headers}")
+
+    current_fractie = None
+    current_zetels = None
+
+    details_info = []
+    for r in rows:
+        cells = r.find_all(["td", "th"])
+
+        if len(cells) == len(headers):
+            # first row of a bloc with rowspan
+            current_fractie = cells[0].get_text(strip=True)
+            current_zetels = int(cells[1].get_text(strip=True))
+            row = {
+                h.lower().replace(" ", "_"): (c.get_text(strip=True) or None)
+                for h, c in zip(headers[2:], cells[2:])
+            }
+        else:
+            # subsequent rows
+            row = {
+                h.lower().replace(" ", "_"): (c.get_text(strip=True) or None)
+                for h, c in zip(headers[2:], cells)
+            }
+
+        details_info.append(
+            {
+                "fractie": current_fractie,
+                "zetels": current_zetels,
+                "kamerlid": row.get("kamerlid"),
+                "stem": row.get("voor/tegen"),
+                "niet_deelgenomen": row.get("niet_deelgenomen"),
+                "vergissing": bool(row.get("vergissing")),
+            }
+        )
+
+    return details_info
+
+
+def parse_indieners_info(url: str, soup: BeautifulSoup) -> list[dict]:
+    indieners = []
+    for li in soup.select("ul.m-list li.m-list__item--variant-member"):
+        # indiener type
+
+        type_span = li.select_one("span.u-font-bold")
+        if type_span is None:
+            raise ValueError(f"Type of (mede)indiener is missing for {url}")
+        type_text = type_span.get_text(strip=True)
+
+        # indiener name
+        label_span = li.select_one("span.m-list__label")
+        if not label_span:
+            raise ValueError(f"2: Name of (mede)indiener is missing for {url}")
+
+        name_link = label_span.select_one("a.h-link-inverse")
+        if name_link:
+            # Try first <a>
+            name_text = name_link.get_text(strip=True)
+        else:
+            # Take the text after the type span
+            texts = [t.strip() for t in label_span.stripped_strings]
+            if len(texts) <= 1:
+                continue
+            full_name = texts[1]
+
+            # Split off descriptor at first comma
+            if "," in full_name:
+                *name_parts, _ = [s.strip() for s in full_name.split(",")]
+                name_text = ", ".join(part.strip() for part in name_parts)
+            else:
+                name_text = full_name
+
+        indieners.append({"type": type_text, "name": name_text})
+
+    if len(indieners) == 0:
+        raise ValueError(f"(Mede)indieners are missing for {url}")
+
+    return indieners
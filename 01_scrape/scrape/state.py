@@ -0,0 +1,191 @@
+import csv
+import json
+import sqlite3
+import threading
+from collections.abc import Iterable
+from pathlib import Path
+
+STATE_PATH = Path(".run") / "state.db"
+LEGACY_PROGRESS_PATH = Path(".run") / "progress.json"
+LEGACY_ERRORS_PATH = Path(".run") / "errors.csv"
+
+
+def connect(path: Path = STATE_PATH) -> sqlite3.Connection:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path, timeout=60, check_same_thread=False)
+    # WAL keeps every commit atomic and lets shard processes write side by side
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+def has_table(conn: sqlite3.Connection, name: str) -> bool:
+    query = "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?"
+    return conn.execute(query, (name,)).fetchone() is not None
+
+
+class ProgressStore:
+    """Processed stemmingen, kept as an in-memory set backed by a SQLite table."""
+
+    def __init__(self, path: Path = STATE_PATH, exclude: Iterable[str] = ()):
+        self.conn = connect(path)
+        is_new = not has_table(self.conn, "progress")
+        with self.conn:
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS progress (
+                    stemming_id TEXT PRIMARY KEY,
+                    stemming_date TEXT NOT NULL
+                )
+            """)
+        if is_new:
+            self.migrate(LEGACY_PROGRESS_PATH)
+
+        exclude = set(exclude)
+        self.done = {
+            (stem_dt, stem_id)
+            for stem_dt, stem_id in self.conn.execute(
+                "SELECT stemming_date, stemming_id FROM progress"
+            )
+            if stem_id not in exclude
+        }
+
+    def __contains__(self, key: tuple[str, str]) -> bool:
+        return key in self.done
+
+    def __len__(self) -> int:
+        return len(self.done)
+
+    def add(self, stem_dt: str, stem_id: str):
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO progress VALUES (?, ?)",
+                (stem_id, stem_dt),
+            )
+        self.done.add((stem_dt, stem_id))
+
+    def replace(self, entries: Iterable[tuple[str, str]]):
+        entries = set(entries)
+        with self.conn:
+            self.conn.execute("DELETE FROM progress")
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO progress VALUES (?, ?)",
+                ((stem_id, stem_dt) for stem_dt, stem_id in entries),
+            )
+        self.done = entries
+
+    def latest_date(self) -> str | None:
+        (stem_dt,) = self.conn.execute("SELECT MAX(stemming_date) FROM progress").fetchone()
+        return stem_dt
+
+    def dates(self, stem_ids: Iterable[str]) -> dict[str, str]:
+        # includes failed stemmingen, which are left out of `done`
+        stem_ids = set(stem_ids)
+        return {
+            stem_id: stem_dt
+            for stem_id, stem_dt in self.conn.execute(
+                "SELECT stemming_id, stemming_date FROM progress"
+            )
+            if stem_id in stem_ids
+        }
+
+    def migrate(self, file_path: Path):
+        # import the old progress.json into a fresh table, then keep it aside
+        if not file_path.exists():
+            return
+        with file_path.open(encoding="utf-8") as f:
+            progress = json.load(f)
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO progress VALUES (?, ?)",
+                ((stem_id, stem_dt) for stem_dt, ids in progress.items() for stem_id in ids),
+            )
+        file_path.rename(file_path.with_suffix(".json.bak"))
+
+    def close(self):
+        self.conn.close()
+
+
+class ErrorLedger:
+    """Failed motions per stemming, batched in memory and flushed per stemming."""
+
+    def __init__(self, path: Path = STATE_PATH):
+        self.lock = threading.Lock()
+        self.conn = connect(path)
+        is_new = not has_table(self.conn, "errors")
+        with self.conn:
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS errors (
+                    stemming_id TEXT NOT NULL,
+                    url TEXT NOT NULL,
+                    error TEXT,
+                    PRIMARY KEY (stemming_id, url)
+                )
+            """)
+        if is_new:
+            self.migrate(LEGACY_ERRORS_PATH)
+
+        self.errors = {}
+        for stem_id, url, err in self.conn.execute("SELECT stemming_id, url, error FROM errors"):
+            self.errors.setdefault(stem_id, {})[url] = err
+        self.dirty = set()
+
+    def add(self, stem_id: str, url: str, err: str):
+        with self.lock:
+            self.errors.setdefault(stem_id, {})[url] = err
+            self.dirty.add(stem_id)
+
+    def remove(self, stem_id: str, url: str | None = None):
+        with self.lock:
+            if stem_id not in self.errors:
+                return
+            if url is None:
+                del self.errors[stem_id]
+            else:
+                self.errors[stem_id].pop(url, None)
+            self.dirty.add(stem_id)
+
+    def flush(self):
+        # rewrite only the stemmingen touched since the last flush
+        with self.lock, self.conn:
+            for stem_id in self.dirty:
+                self.conn.execute("DELETE FROM errors WHERE stemming_id = ?", (stem_id,))
+                self.conn.executemany(
+                    "INSERT INTO errors VALUES (?, ?, ?)",
+                    ((stem_id, url, err) for url, err in self.errors.get(stem_id, {}).items()),
+                )
+                if not self.errors.get(stem_id):
+                    self.errors.pop(stem_id, None)
+            self.dirty.clear()
+
+    def stemming_ids(self) -> set[str]:
+        with self.lock:
+            return {stem_id for stem_id, urls in self.errors.items() if urls}
+
+    def rows(self) -> list[tuple[str, str, str]]:
+        with self.lock:
+            return sorted(
+                (stem_id, url, err)
+                for stem_id, urls in self.errors.items()
+                for url, err in urls.items()
+            )
+
+    def export(self, file_path: Path):
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        with file_path.open("w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["stemming_id", "url", "error"])
+            writer.writerows(self.rows())
+
+    def migrate(self, file_path: Path):
+        # import the old errors.csv into a fresh table, then keep it aside
+        if not file_path.exists():
+            return
+        with file_path.open(encoding="utf-8", newline="") as f:
+            rows = [(r["stemming_id"], r["url"], r["error"]) for r in csv.DictReader(f)]
+        with self.conn:
+            self.conn.executemany("INSERT OR REPLACE INTO errors VALUES (?, ?, ?)", rows)
+        file_path.rename(file_path.with_suffix(".csv.bak"))
+
+    def close(self):
+        self.flush()
+        self.conn.close()
@@ -0,0 +1,30 @@
+import polars as pl
+
+
+class TableBuilder:
+    """Collects rows per table and materializes every DataFrame only once."""
+
+    def __init__(self, schemas: dict[str, dict]):
+        self.schemas = schemas
+        self.rows = {key: [] for key in schemas}
+
+    def __len__(self) -> int:
+        return sum(len(rows) for rows in self.rows.values())
+
+    def add(self, key: str, row: dict):
+        self.rows[key].append(row)
+
+    def extend(self, key: str, rows: list[dict]):
+        self.rows[key].extend(rows)
+
+    def merge(self, other: "TableBuilder"):
+        for key, rows in other.rows.items():
+            self.rows[key].extend(rows)
+
+    def build(self) -> dict[str, pl.DataFrame]:
+        tables = {}
+        for key, schema in self.schemas.items():
+            # transpose to column buffers, so polars builds each column in one go
+            columns = {col: [row.get(col) for row in self.rows[key]] for col in schema}
+            tables[key] = pl.DataFrame(columns, schema=schema, strict=False)
+        return tables
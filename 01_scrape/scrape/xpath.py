@@ -0,0 +1,443 @@
+import re
+import threading
+
+from lxml import etree
+
+from scrape.dates import parse_dutch_date_str
+from scrape.site import DOWNLOAD_URL, EXPECTED_HEADERS, WETSVOORSTELLEN
+
+# a parser is not safe to share between threads, so every fetch thread gets its own
+_parsers = threading.local()
+
+
+def has_class(name: str) -> str:
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+# every node any of the parsers starts from, found in one pass over the document
+PAGE_NODES = etree.XPath(
+    "//*["
+    "self::h1 or self::h2 or self::h3"
+    f" or (self::div and ({has_class('m-card')} or {has_class('m-modal__content')}"
+    f" or {has_class('m-vote-result__bar')} or {has_class('m-vote-result__label')}))"
+    f" or (self::span and {has_class('h-visually-hidden')})"
+    f" or (self::li and {has_class('m-list__item--variant-member')})"
+    " or (self::a and starts-with(@aria-label, 'Download kamerstuk'))"
+    " or (self::meta and @name = 'dcterms.title')"
+    " or @id = 'votes-details'"
+    "]"
+)
+
+# text as bs4 returns it from get_text(), which skips comments, scripts and styles
+TEXT = etree.XPath(
+    "descendant-or-self::text()[not(ancestor::script or ancestor::style"
+    " or ancestor::template or ancestor::rt or ancestor::rp)]",
+    smart_strings=False,
+)
+
+LISTING_LINK = etree.XPath(f".//h4[{has_class('u-mt-0')}]/a")
+LISTING_TIME = etree.XPath(f".//time[{has_class('u-text-primary')}]")
+LISTING_ID = etree.XPath(f".//p[{has_class('u-text-dark-gray')}]")
+
+MOTION_LINK = etree.XPath(f".//h3[{has_class('m-card__title')}]/a")
+MOTION_PARAGRAPHS = etree.XPath(f".//p[{has_class('u-mt-8')}]")
+BOLD_SPAN = etree.XPath(f".//span[{has_class('u-font-bold')}]")
+
+TITLE_SPAN = etree.XPath(f".//span[{has_class('u-text-primary')} and {has_class('u-font-normal')}]")
+DATE_SPAN = etree.XPath(f".//span[{has_class('u-font-normal')}]")
+FIRST_SPAN = etree.XPath(".//span")
+
+DETAILS_ROWS = etree.XPath(f".//table[{has_class('h-table-bordered')}]//tbody//tr")
+DETAILS_HEADERS = etree.XPath(".//table//thead//th")
+DETAILS_BODY_ROWS = etree.XPath(".//table//tbody//tr")
+CELLS = etree.XPath(".//*[self::td or self::th]")
+
+MEMBER_LIST = etree.XPath(f"ancestor::ul[{has_class('m-list')}]")
+MEMBER_LABEL = etree.XPath(f".//span[{has_class('m-list__label')}]")
+MEMBER_LINK = etree.XPath(f".//a[{has_class('h-link-inverse')}]")
+
+
+class Page:
+    """An lxml tree of one page, with the nodes of PAGE_NODES grouped by what they are."""
+
+    def __init__(self, content: bytes):
+        self.root = etree.fromstring(content, html_parser())
+        self.nodes = PAGE_NODES(self.root) if self.root is not None else []
+        self.groups = {}
+        for node in self.nodes:
+            for key in node_keys(node):
+                self.groups.setdefault(key, []).append(node)
+
+    def get(self, key: str) -> list:
+        return self.groups.get(key, [])
+
+
+def node_keys(node) -> list[str]:
+    classes = (node.get("class") or "").split()
+    keys = [node.tag] if node.tag in ("h1", "h2", "h3") else []
+    if node.tag == "div":
+        keys += [c for c in ("m-card", "m-modal__content") if c in classes]
+        keys += [c for c in ("m-vote-result__bar", "m-vote-result__label") if c in classes]
+    elif node.tag == "span" and "h-visually-hidden" in classes:
+        keys.append("hidden")
+    elif node.tag == "li" and "m-list__item--variant-member" in classes:
+        keys.append("member")
+    elif node.tag == "a" and (node.get("aria-label") or "").startswith("Download kamerstuk"):
+        keys.append("download")
+    elif node.tag == "meta" and node.get("name") == "dcterms.title":
+        keys.append("title")
+    if node.get("id") == "votes-details":
+        keys.append("votes-details")
+    return keys
+
+
+def get_text(node, strip: bool = False) -> str:
+    if strip:
+        return "".join(t.strip() for t in TEXT(node))
+    return "".join(TEXT(node))
+
+
+def stripped_strings(node) -> list[str]:
+    return [t.strip() for t in TEXT(node) if t.strip()]
+
+
+def first(nodes: list):
+    return nodes[0] if nodes else None
+
+
+def string(node) -> str | None:
+    # the single string a node holds, like bs4's Tag.string
+    contents = ([node.text] if node.text else []) + [
+        item for child in node for item in ([child, child.tail] if child.tail else [child])
+    ]
+    if len(contents) != 1:
+        return None
+    if isinstance(contents[0], str):
+        return contents[0]
+    if not isinstance(contents[0].tag, str):
+        return contents[0].text
+    return string(contents[0])
+
+
+def next_string(node) -> str:
+    if node.tail is None:
+        raise ValueError("Expected text after a visually hidden label")
+    return node.tail
+
+
+def html_parser() -> etree.HTMLParser:
+    # the site is served as utf-8, with or without a charset in the markup
+    if not hasattr(_parsers, "parser"):
+        _parsers.parser = etree.HTMLParser(encoding="utf-8")
+    return _parsers.parser
+
+
+def parse_html(content: bytes) -> Page:
+    return Page(content)
+
+
+def parse_listing_cards(url: str, page: Page) -> list[dict]:
+    cards = []
+    for card in page.get("m-card"):
+        a_tag = first(LISTING_LINK(card))
+        if a_tag is not None:
+            link = a_tag.get("href")
+
+        time_tag = first(LISTING_TIME(card))
+        if time_tag is not None:
+            stem_dt = get_text(time_tag, strip=True)
+            stem_dt = parse_dutch_date_str(stem_dt)
+
+        id_tag = first(LISTING_ID(card))
+        if id_tag is not None:
+            stem_id = get_text(id_tag, strip=True)
+
+        cards.append(
+            {
+                "link": link,
+                "stem_dt": stem_dt,
+                "stem_id": stem_id,
+            }
+        )
+
+    if len(cards) == 0:
+        raise ValueError(f"No links found for {url}")
+
+    return cards
+
+
+def parse_stemming_page_info(url: str, page: Page) -> dict:
+    # stemming id & did
+    match = re.search(r"id=([^&]+)&(?:did|dossier)=([^&]+)", url)
+    if not match:
+        raise ValueError(f"ID and DID missing from motion for {url}")
+    stemming_id = match.group(1)
+    stemming_did = match.group(2)
+
+    # stemming title
+    meta_tag = first(page.get("title"))
+    if meta_tag is None:
+        raise ValueError(f"Stemming title is missing for {url}")
+    stemming_title = meta_tag.get("content")
+
+    # stemming type & date
+    h2_tags = page.get("h2")
+    if len(h2_tags) != 1:
+        raise ValueError(f"Stemming subtitle is missing or not unique for {url}")
+
+    h2 = h2_tags[0]
+    span = first(DATE_SPAN(h2))
+    if span is None:
+        raise ValueError(f"Stemming date is missing for {url}")
+    stemming_date = get_text(span, strip=True)
+
+    # The meeting type is everything in h2 minus the span
+    if h2.text is None and len(h2):
+        raise ValueError(f"Stemming type is missing for {url}")
+    stemming_type = h2.text.strip() if h2.text else None
+
+    return {
+        "stemming_id": stemming_id,
+        "stemming_did": stemming_did,
+        "titel": stemming_title,
+        "datum": stemming_date,
+        "type": stemming_type,
+    }
+
+
+def parse_motion_cards(url: str, page: Page) -> list[tuple[str, str]]:
+    motions = []
+    for k, card in enumerate(page.get("m-card")):
+        # Find the main motion link
+        link_tag = first(MOTION_LINK(card))
+        if link_tag is None:
+            raise ValueError(f"Cannot find link of motion {k} for {url}")
+        link = link_tag.get("href")
+
+        # Find the paragraph with "Besluit"
+        besluit_tag = None
+        for p in MOTION_PARAGRAPHS(card):
+            if "Besluit" in get_text(p):
+                besluit_tag = first(BOLD_SPAN(p))
+                break
+        if besluit_tag is None:
+            raise ValueError(f"Cannot find decision of motion {k} for {url}")
+        besluit = get_text(besluit_tag, strip=True).strip(".")
+
+        motions.append((link, besluit))
+
+    return motions
+
+
+def parse_motie_info(url: str, page: Page) -> dict:
+    # motie id & did
+    match = re.search(r"id=([^&]+)&(?:did|dossier)=([^&]+)", url)
+    if not match:
+        raise ValueError(f"ID and DID missing from motion for {url}")
+    motie_id = match.group(1)
+    motie_did = match.group(2)
+
+    # motie document nr & date, in one go over the hidden labels
+    all_doc_nrs = []
+    all_dates = []
+    for span in page.get("hidden"):
+        label = get_text(span)
+        if "Nummer:" in label:
+            all_doc_nrs.append(next_string(span).strip())
+        if "Datum:" in label:
+            all_dates.append(next_string(span).strip())
+
+    if len(all_doc_nrs) != 1:
+        raise ValueError(f"Document nr missing or not unique for {url}")
+    motie_document_nr = all_doc_nrs[0]
+
+    if len(all_dates) != 1:
+        raise ValueError(f"Date missing or not unique for {url}")
+    motie_date = all_dates[0]
+
+    # motion type & title
+    all_titles = []
+    for h1 in page.get("h1"):
+        span = first(TITLE_SPAN(h1))
+        if span is not None:
+            motion_type = get_text(span, strip=True)
+            # collect all non-span text inside the h1
+            title_text = "".join(t for t in stripped_strings(h1) if t != motion_type and t != ":")
+            all_titles.append({"type": motion_type, "titel": title_text})
+
+    if len(all_titles) != 1:
+        raise ValueError(f"Title missing or not unique for {url}")
+    motie_type, motie_title = all_titles[0]["type"], all_titles[0]["titel"]
+
+    # check for early exits
+    if motie_type.lower().strip() in WETSVOORSTELLEN:
+        # TODO: implement wetsvoorstellen
+        return {
+            "motie_id": motie_id,
+            "motie_did": motie_did,
+            "document_nr": motie_document_nr,
+            "datum": motie_date,
+            "titel": motie_title,
+            "type": motie_type,
+            "text": None,
+            "is_fallback": False,
+            "download": None,
+        }
+
+    # motie pdf url
+    download_tag = first(page.get("download"))
+    if download_tag is None:
+        raise ValueError(f"Motie PDF is missing for {url}")
+    motie_download = DOWNLOAD_URL.format(link=download_tag.get("href").strip("/"))
+
+    # motion text
+    content = first(page.get("m-modal__content"))
+    if content is not None:
+        # normalize whitespace
+        is_fallback = False
+        motie_text = " ".join(stripped_strings(content))
+        motie_text = " ".join(motie_text.split())
+    else:
+        # fallback to parsing download, see parse_motie_page
+        is_fallback = True
+        motie_text = None
+
+    return {
+        "motie_id": motie_id,
+        "motie_did": motie_did,
+        "document_nr": motie_document_nr,
+        "datum": motie_date,
+        "titel": motie_title,
+        "type": motie_type,
+        "text": motie_text,
+        "is_fallback": is_fallback,
+        "download": motie_download,
+    }
+
+
+def parse_uitslag_info(url: str, page: Page) -> dict | None:
+    h2 = None
+    for node in page.get("h2"):
+        text = string(node)
+        if text and "Stemmingsuitslagen" in text:
+            h2 = node
+            break
+    if h2 is None:
+        return None
+
+    # motie uitslag text: the first h3 after the h2, in document order
+    h3 = None
+    for node in page.nodes[page.nodes.index(h2) + 1 :]:
+        if node.tag == "h3":
+            h3 = node
+            break
+    if h3 is None:
+        raise ValueError(f"Uitslag is missing from stemmingsuitslagen for {url}")
+    uitslag = get_text(h3, strip=True)
+
+    # motie uitslag counts
+
+    # Voor
+    vote_result = first(page.get("m-vote-result__bar"))
+    if vote_result is None:
+        raise ValueError(f"Vote result is missing for {url}")
+    voor = int(vote_result.get("data-vote-result", "0") or "0")
+
+    # Vereist & Totaal: inside hidden spans
+    labels = page.get("m-vote-result__label")
+    vereist = int(get_text(FIRST_SPAN(labels[1])[0], strip=True).split(": ")[1])
+    totaal = int(get_text(FIRST_SPAN(labels[2])[0], strip=True).split(": ")[1])
+
+    return {"uitslag": uitslag, "voor": voor, "vereist": vereist, "totaal": totaal}
+
+
+def parse_details_info(url: str, page: Page) -> list[dict]:
+    sections = page.get("votes-details")
+    rows = [row for section in sections for row in DETAILS_ROWS(section)][1:]  # skip header row
+
+    headers = [get_text(th, strip=True) for s in sections for th in DETAILS_HEADERS(s)]
+    if not headers:
+        body_rows = [row for section in sections for row in DETAILS_BODY_ROWS(section)]
+        headers = [get_text(th, strip=True) for th in CELLS(body_rows[0])]
+
+    if headers[:3] != EXPECTED_HEADERS[0] and headers[:4] != EXPECTED_HEADERS[1]:
+        raise ValueError(f"Unexpected table headers: {headers}")
+
+    current_fractie = None
+    current_zetels = None
+
+    details_info = []
+    for r in rows:
+        cells = CELLS(r)
+
+        if len(cells) == len(headers):
+            # first row of a bloc with rowspan
+            current_fractie = get_text(cells[0], strip=True)
+            current_zetels = int(get_text(cells[1], strip=True))
+            row = {
+                h.lower().replace(" ", "_"): (get_text(c, strip=True) or None)
+                for h, c in zip(headers[2:], cells[2:])
+            }
+        else:
+            # subsequent rows
+            row = {
+                h.lower().replace(" ", "_"): (get_text(c, strip=True) or None)
+                for h, c in zip(headers[2:], cells)
+            }
+
+        details_info.append(
+            {
+                "fractie": current_fractie,
+                "zetels": current_zetels,
+                "kamerlid": row.get("kamerlid"),
+                "stem": row.get("voor/tegen"),
+                "niet_deelgenomen": row.get("niet_deelgenomen"),
+                "vergissing": bool(row.get("vergissing")),
+            }
+        )
+
+    return details_info
+
+
+def parse_indieners_info(url: str, page: Page) -> list[dict]:
+    indieners = []
+    for li in page.get("member"):
+        if not MEMBER_LIST(li):
+            continue
+
+        # indiener type
+
+        type_span = first(BOLD_SPAN(li))
+        if type_span is None:
+            raise ValueError(f"Type of (mede)indiener is missing for {url}")
+        type_text = get_text(type_span, strip=True)
+
+        # indiener name
+        label_span = first(MEMBER_LABEL(li))
+        if label_span is None:
+            raise ValueError(f"2: Name of (mede)indiener is missing for {url}")
+
+        name_link = first(MEMBER_LINK(label_span))
+        if name_link is not None:
+            # Try first <a>
+            name_text = get_text(name_link, strip=True)
+        else:
+            # Take the text after the type span
+            texts = stripped_strings(label_span)
+            if len(texts) <= 1:
+                continue
+            full_name = texts[1]
+
+            # Split off descriptor at first comma
+            if "," in full_name:
+                *name_parts, _ = [s.strip() for s in full_name.split(",")]
+                name_text = ", ".join(part.strip() for part in name_parts)
+            else:
+                name_text = full_name
+
+        indieners.append({"type": type_text, "name": name_text})
+
+    if len(indieners) == 0:
+        raise ValueError(f"(Mede)indieners are missing for {url}")
+
+    return indieners
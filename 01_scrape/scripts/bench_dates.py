@@ -0,0 +1,79 @@
+"""Compare per-value dateparser calls against the vectorized Dutch date parser.
+
+Run from 01_scrape with `uv run python -m scripts.bench_dates`.
+"""
+
+import random
+import time
+from datetime import date, timedelta
+
+import click
+import polars as pl
+from dateparser import parse as parse_date
+
+from scrape.dates import parse_dutch_dates
+
+MONTH_NAMES = [
+    "januari",
+    "februari",
+    "maart",
+    "april",
+    "mei",
+    "juni",
+    "juli",
+    "augustus",
+    "september",
+    "oktober",
+    "november",
+    "december",
+]
+
+
+def fake_dates(n: int, seed: int = 0) -> list[str | None]:
+    rng = random.Random(seed)
+    start = date(2000, 1, 1)
+    values = []
+    for _ in range(n):
+        day = start + timedelta(days=rng.randrange(9000))
+        value = f"{day.day} {MONTH_NAMES[day.month - 1]} {day.year}"
+        # a few nulls and weekday-prefixed strings, like the site shows them
+        roll = rng.random()
+        if roll < 0.01:
+            value = None
+        elif roll < 0.1:
+            value = f"donderdag {value}"
+        values.append(value)
+    return values
+
+
+@click.command()
+@click.option("--size", type=int, default=1_000_000)
+@click.option("--sample", type=int, default=5_000)
+def main(size, sample):
+    """Time parsing SIZE dates; dateparser is timed on SAMPLE values and extrapolated."""
+    values = pl.Series("datum", fake_dates(size))
+
+    head = values.head(sample)
+    start = time.perf_counter()
+    expected = pl.Series(
+        "datum",
+        [parse_date(x, languages=["nl"]).date() if x else None for x in head],
+        dtype=pl.Date,
+    )
+    t_old = (time.perf_counter() - start) * size / sample
+
+    start = time.perf_counter()
+    parsed = parse_dutch_dates(values)
+    t_new = time.perf_counter() - start
+
+    if not parsed.head(sample).equals(expected):
+        raise ValueError("Vectorized parser differs from dateparser")
+
+    print(f"{size:,} dates")
+    print(f"  dateparser per value: {t_old:8.2f} s (extrapolated from {sample:,})")
+    print(f"  vectorized:           {t_new:8.2f} s")
+    print(f"  speedup:              {t_old / t_new:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
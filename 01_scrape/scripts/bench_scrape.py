@@ -0,0 +1,134 @@
+"""Measure the end-to-end throughput of a scrape against the local stand-in site.
+
+Writes a corpus of `--stemmingen` stemmingen, serves it with scripts.fake_server in a separate
+process and runs `scrape.main.run` against it in a scratch directory, so nothing touches the
+real site or the local .run state. Reports stemmingen and motions per second and the latency
+of the requests as seen by the scraper.
+
+Run from 01_scrape with `uv run python -m scripts.bench_scrape`.
+"""
+
+import contextlib
+import io
+import multiprocessing
+import os
+import socket
+import statistics
+import tempfile
+import threading
+import time
+from datetime import date
+from pathlib import Path
+
+import click
+import polars as pl
+import requests
+
+from scrape.main import run
+from scripts.fake_server import serve
+from scripts.make_fixtures import write_fixtures
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for(port: int, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with contextlib.suppress(OSError), socket.create_connection(("127.0.0.1", port), 1):
+            return
+        time.sleep(0.05)
+    raise ValueError(f"Fake server on port {port} did not start")
+
+
+@contextlib.contextmanager
+def timed_requests() -> list[float]:
+    # record how long every request takes, as seen by the scraper
+    latencies = []
+    lock = threading.Lock()
+    original = requests.Session.get
+
+    def get(self, url, **kwargs):
+        start = time.perf_counter()
+        try:
+            return original(self, url, **kwargs)
+        finally:
+            with lock:
+                latencies.append(time.perf_counter() - start)
+
+    requests.Session.get = get
+    try:
+        yield latencies
+    finally:
+        requests.Session.get = original
+
+
+def percentile(values: list[float], q: int) -> float:
+    if len(values) < 2:
+        return values[0] if values else 0.0
+    return statistics.quantiles(values, n=100, method="inclusive")[q - 1]
+
+
+@click.command()
+@click.option("--stemmingen", type=int, default=60)
+@click.option("--concurrency", type=int, default=8)
+@click.option("--latency", type=float, default=0.05)
+@click.option("--jitter", type=float, default=0.02)
+@click.option("--error-rate", type=float, default=0.0)
+@click.option("--parser", type=click.Choice(["bs4", "lxml"]), default="bs4")
+@click.option("--document-workers", type=int, default=2)
+@click.option("--max-rate", type=float, default=1000.0)
+def main(stemmingen, concurrency, latency, jitter, error_rate, parser, document_workers, max_rate):
+    """Scrape a generated corpus from the fake server and report the throughput."""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        write_fixtures(tmp / "fixtures", stemmingen)
+
+        port = free_port()
+        server = multiprocessing.get_context("spawn").Process(
+            target=serve,
+            args=(tmp / "fixtures", port),
+            kwargs={"latency": latency, "jitter": jitter, "error_rate": error_rate},
+            daemon=True,
+        )
+        server.start()
+        cwd = os.getcwd()
+        try:
+            wait_for(port)
+            os.chdir(tmp)
+            with timed_requests() as latencies, contextlib.redirect_stdout(io.StringIO()):
+                start = time.perf_counter()
+                run(
+                    from_date=date(2025, 1, 1),
+                    to_date=date(2025, 12, 31),
+                    output_dir="out",
+                    full_refresh=False,
+                    select=None,
+                    concurrency=concurrency,
+                    cache=False,
+                    parser=parser,
+                    document_workers=document_workers,
+                    max_rate=max_rate,
+                    max_download_rate=max_rate,
+                    base_url=f"http://127.0.0.1:{port}/",
+                )
+                elapsed = time.perf_counter() - start
+        finally:
+            os.chdir(cwd)
+            server.terminate()
+
+        scraped = len(list((tmp / "out").glob("*/*")))
+        motions = sum(pl.read_csv(f).height for f in (tmp / "out").glob("*/*/motie.csv"))
+
+    print(f"{scraped} stemmingen, {motions} motions, {len(latencies)} requests in {elapsed:.2f}s")
+    print(f"  stemmingen/s: {scraped / elapsed:8.2f}")
+    print(f"  motions/s:    {motions / elapsed:8.2f}")
+    print(f"  p50 latency:  {percentile(latencies, 50) * 1000:8.1f} ms")
+    print(f"  p99 latency:  {percentile(latencies, 99) * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""Micro-benchmarks of the parsing, extraction and table hot paths over the pages in fixtures/.
+
+Every benchmark is timed as the best of `--repeat` rounds, where a round calls it often enough to
+take at least MIN_ROUND seconds. The timings are written as JSON and compared against a stored
+baseline; benchmarks more than `--threshold` times slower than their baseline are flagged as
+regressions and the script exits with an error. Baselines are machine specific, so store one
+with `--save-baseline` before comparing against it.
+
+Run from 01_scrape with `uv run python -m scripts.bench_suite`.
+"""
+
+import json
+import platform
+import tempfile
+import time
+from collections.abc import Callable
+from datetime import datetime
+from functools import partial
+from pathlib import Path
+
+import click
+import polars as pl
+
+from scrape.dates import dutch_date_expr
+from scrape.documents import parse_document
+from scrape.main import PARSERS, bind_motie, create_tables
+from scrape.sinks import write_tables
+from scripts.bench_dates import fake_dates
+
+BASELINE_PATH = Path("scripts") / "bench_baseline.json"
+MIN_ROUND = 0.05
+
+# the pages of the corpus each benchmark runs on, see scripts/make_fixtures.py
+LISTING = "listing/page-0.html"
+STEMMING = "stemming/2025P00000.html"
+MOTIE = "motie/2025Z00000.html"
+ROLL_CALL = "motie/2025Z00007.html"
+DOCX = "download/2025Z00005.docx"
+PDF = "download/2025Z01005.pdf"
+
+
+def measure(func: Callable, repeat: int) -> tuple[float, int]:
+    # calls per round, doubled until a round is long enough to time reliably
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        if time.perf_counter() - start >= MIN_ROUND:
+            break
+        number *= 2
+
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best, number
+
+
+def benchmarks(fixtures: Path, scratch: Path) -> dict[str, Callable]:
+    index = json.loads((fixtures / "pages.json").read_text(encoding="utf-8"))
+    urls = {page["path"]: page["url"] for page in index}
+
+    def page(path: str) -> tuple[str, bytes]:
+        return urls[path], (fixtures / path).read_bytes()
+
+    benches = {}
+    for name, backend in PARSERS.items():
+        for path in [LISTING, STEMMING, MOTIE, ROLL_CALL]:
+            _, content = page(path)
+            benches[f"{name}.parse_html[{path}]"] = partial(backend.parse_html, content)
+
+        def parsed(path: str):
+            url, content = page(path)
+            return url, backend.parse_html(content)
+
+        calls = [
+            ("parse_listing_cards", LISTING),
+            ("parse_stemming_page_info", STEMMING),
+            ("parse_motion_cards", STEMMING),
+            ("parse_motie_info", MOTIE),
+            ("parse_indieners_info", MOTIE),
+            ("parse_uitslag_info", MOTIE),
+            ("parse_details_info", MOTIE),
+            ("parse_details_info", ROLL_CALL),
+        ]
+        for func, path in calls:
+            benches[f"{name}.{func}[{path}]"] = partial(getattr(backend, func), *parsed(path))
+
+    for path in [DOCX, PDF]:
+        _, content = page(path)
+        benches[f"documents.parse_document[{path}]"] = partial(parse_document, content)
+
+    # the tables of a stemming with every motie of the corpus, as parse_stemming_page merges them
+    backend = PARSERS["lxml"]
+    moties = []
+    for entry in index:
+        if entry["kind"] == "motie":
+            url, content = page(entry["path"])
+            doc = backend.parse_html(content)
+            data = create_tables()
+            data.add("motie", {**backend.parse_motie_info(url, doc), "text": None})
+            data.extend("indieners", backend.parse_indieners_info(url, doc))
+            if backend.parse_uitslag_info(url, doc) is not None:
+                data.extend("details", backend.parse_details_info(url, doc))
+            moties.append(data)
+
+    def build_tables() -> dict[str, pl.DataFrame]:
+        result = create_tables()
+        for data in moties:
+            result.merge(bind_motie(data, stemming_id="2025P00000", besluit="Aangenomen"))
+        return result.build()
+
+    benches["tables.merge_build"] = build_tables
+    tables = build_tables()
+    benches["sinks.write_tables"] = partial(write_tables, tables, scratch / "tables")
+
+    # the date conversion of the loader's scan_table, on a motie.csv sized column
+    dates_csv = scratch / "dates.csv"
+    pl.DataFrame({"datum": fake_dates(10_000)}).write_csv(dates_csv)
+    scan = pl.scan_csv(dates_csv, schema={"datum": pl.String}).with_columns(
+        dutch_date_expr("datum")
+    )
+    benches["dates.scan_dutch_dates[10k]"] = scan.collect
+
+    return benches
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    regressions = []
+    for name, result in results.items():
+        seconds = result["seconds"]
+        line = f"  {name:60s} {seconds * 1e6:10.1f} us"
+        if name in baseline:
+            ratio = seconds / baseline[name]["seconds"]
+            line += f" {ratio:6.2f}x"
+            if ratio > threshold:
+                line += "  REGRESSION"
+                regressions.append(name)
+        print(line)
+    return regressions
+
+
+@click.command()
+@click.option("--fixtures", type=click.Path(exists=True, file_okay=False), default="fixtures")
+@click.option("--output", type=click.Path(dir_okay=False), default=".run/bench.json")
+@click.option("--baseline", type=click.Path(dir_okay=False), default=str(BASELINE_PATH))
+@click.option("--save-baseline", is_flag=True)
+@click.option("--threshold", type=float, default=1.5)
+@click.option("--repeat", type=int, default=5)
+@click.option("--filter", "pattern", type=str)
+def main(fixtures, output, baseline, save_baseline, threshold, repeat, pattern):
+    """Time the hot paths on the pages in FIXTURES and compare against a baseline."""
+    with tempfile.TemporaryDirectory() as scratch:
+        benches = benchmarks(Path(fixtures), Path(scratch))
+        if pattern:
+            benches = {name: func for name, func in benches.items() if pattern in name}
+
+        results = {}
+        for name, func in benches.items():
+            seconds, number = measure(func, repeat)
+            results[name] = {"seconds": seconds, "number": number}
+
+    report = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": results,
+    }
+    output = Path(output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+
+    baseline = Path(baseline)
+    stored = {}
+    if baseline.exists():
+        stored = json.loads(baseline.read_text(encoding="utf-8"))["results"]
+
+    print(f"{len(results)} benchmarks (best of {repeat}), written to {output}")
+    regressions = compare(results, stored, threshold)
+
+    if save_baseline:
+        # keep the baseline of benchmarks that were filtered out
+        report["results"] = {**stored, **results}
+        baseline.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+        print(f"Saved the baseline to {baseline}")
+    elif regressions:
+        raise click.ClickException(
+            f"{len(regressions)} benchmarks are more than {threshold}x slower than the baseline"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""Compare the TableBuilder against the old concat-per-motion table building.
+
+Run from 01_scrape with `uv run python -m scripts.bench_tables`.
+"""
+
+import time
+
+import click
+import polars as pl
+
+from scrape.main import (
+    DETAILS_SCHEMA,
+    INDIENERS_SCHEMA,
+    MOTIE_SCHEMA,
+    STEMMING_SCHEMA,
+    create_tables,
+)
+
+
+def fake_motie(stemming_id: str, k: int, n_details: int) -> dict:
+    motie_id = f"2025Z{k:05d}"
+    motie_info = {
+        "stemming_id": stemming_id,
+        "motie_id": motie_id,
+        "motie_did": f"2025D{k:05d}",
+        "document_nr": f"36600-{k}",
+        "datum": "12 maart 2025",
+        "titel": f"Motie van het lid Jansen over onderwerp {k}",
+        "type": "Motie",
+        "text": "De Kamer, gehoord de beraadslaging, verzoekt de regering " * 10,
+        "is_fallback": False,
+        "download": f"https://www.tweedekamer.nl/downloads/document?id=2025D{k:05d}",
+        "besluit": "Aangenomen",
+        "uitslag": "Aangenomen.",
+        "voor": 86,
+        "vereist": 76,
+        "totaal": 150,
+    }
+    indieners_info = [
+        {"stemming_id": stemming_id, "motie_id": motie_id, "name": name, "type": kind}
+        for name, kind in [("J. Jansen", "Indiener"), ("P. Pietersen", "Medeindiener")]
+    ]
+    details_info = [
+        {
+            "stemming_id": stemming_id,
+            "motie_id": motie_id,
+            "fractie": f"Fractie {i % 15}",
+            "zetels": 10,
+            "kamerlid": f"Kamerlid {i}",
+            "stem": "Voor" if i % 2 else "Tegen",
+            "niet_deelgenomen": None,
+            "vergissing": False,
+        }
+        for i in range(n_details)
+    ]
+    return {"motie": motie_info, "indieners": indieners_info, "details": details_info}
+
+
+def build_concat(stemming_info: dict, moties: list[dict]) -> dict[str, pl.DataFrame]:
+    # the previous implementation: one-row frames per motion, folded in with pl.concat
+    result = {
+        "stemming": pl.DataFrame(schema=STEMMING_SCHEMA),
+        "motie": pl.DataFrame(schema=MOTIE_SCHEMA),
+        "indieners": pl.DataFrame(schema=INDIENERS_SCHEMA),
+        "details": pl.DataFrame(schema=DETAILS_SCHEMA),
+    }
+    result["stemming"] = pl.concat([result["stemming"], pl.DataFrame(stemming_info)])
+    for motie in moties:
+        data = {
+            "stemming": pl.DataFrame(schema=STEMMING_SCHEMA),
+            "motie": pl.concat(
+                [
+                    pl.DataFrame(schema=MOTIE_SCHEMA),
+                    pl.DataFrame(motie["motie"], schema=MOTIE_SCHEMA),
+                ]
+            ),
+            "indieners": pl.concat(
+                [
+                    pl.DataFrame(schema=INDIENERS_SCHEMA),
+                    pl.DataFrame(motie["indieners"], schema=INDIENERS_SCHEMA),
+                ]
+            ),
+            "details": pl.concat(
+                [
+                    pl.DataFrame(schema=DETAILS_SCHEMA),
+                    pl.DataFrame(motie["details"], schema=DETAILS_SCHEMA),
+                ]
+            ),
+        }
+        result = {key: pl.concat([result[key], data[key]]) for key in result}
+    return result
+
+
+def build_builder(stemming_info: dict, moties: list[dict]) -> dict[str, pl.DataFrame]:
+    result = create_tables()
+    result.add("stemming", stemming_info)
+    for motie in moties:
+        data = create_tables()
+        data.add("motie", motie["motie"])
+        data.extend("indieners", motie["indieners"])
+        data.extend("details", motie["details"])
+        result.merge(data)
+    return result.build()
+
+
+def timeit(func, *args, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+@click.command()
+@click.option("--motions", type=int, default=100)
+@click.option("--details", type=int, default=150)
+@click.option("--repeat", type=int, default=5)
+def main(motions, details, repeat):
+    """Time building the tables of one stemming with MOTIONS motions."""
+    stemming_info = {
+        "stemming_id": "2025P00001",
+        "stemming_did": "2025D00001",
+        "titel": "Stemmingsuitslagen 12 maart 2025",
+        "datum": "12 maart 2025",
+        "type": "Plenaire vergadering",
+    }
+    moties = [fake_motie(stemming_info["stemming_id"], k, details) for k in range(motions)]
+
+    old = build_concat(stemming_info, moties)
+    new = build_builder(stemming_info, moties)
+    for key in old:
+        if not old[key].equals(new[key]):
+            raise ValueError(f"Table {key} differs between implementations")
+
+    t_old = timeit(build_concat, stemming_info, moties, repeat=repeat)
+    t_new = timeit(build_builder, stemming_info, moties, repeat=repeat)
+
+    print(f"{motions} motions x {details} details rows (best of {repeat})")
+    print(f"  pl.concat per motion: {t_old * 1000:8.1f} ms")
+    print(f"  TableBuilder:         {t_new * 1000:8.1f} ms")
+    print(f"  speedup:              {t_old / t_new:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Check that a run whose requests both fail and get a status still writes its metrics.
+
+Serves the fixtures with scripts.fake_server at a latency around the client timeout, so some
+requests time out (status "error") while others get a 200 or an injected 503, and runs
+`scrape.main.run` against it in a scratch directory. The run itself may fail; its JSON and
+Prometheus files have to be written either way. Runs again, up to `--attempts` times, until
+one run saw both a failed request and an HTTP status.
+
+Run from 01_scrape with `uv run python -m scripts.check_metrics`.
+"""
+
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import tempfile
+from datetime import date
+from pathlib import Path
+
+import click
+
+from scrape.main import run
+from scripts.bench_scrape import free_port, wait_for
+from scripts.fake_server import serve
+
+
+def scrape(workdir: Path, port: int, timeout: float) -> str | None:
+    cwd = os.getcwd()
+    try:
+        os.chdir(workdir)
+        with contextlib.redirect_stdout(io.StringIO()):
+            run(
+                from_date=date(2025, 1, 1),
+                to_date=date(2025, 12, 31),
+                output_dir="out",
+                full_refresh=False,
+                select=None,
+                concurrency=4,
+                timeout=timeout,
+                retries=0,
+                cache=False,
+                document_workers=0,
+                base_url=f"http://127.0.0.1:{port}/",
+                metrics_file="metrics.json",
+                prometheus_file="metrics.prom",
+            )
+    except Exception as err:
+        return str(err)
+    finally:
+        os.chdir(cwd)
+    return None
+
+
+def statuses(summary: dict) -> set[str]:
+    return {
+        counter["labels"]["status"]
+        for counter in summary["counters"]
+        if counter["name"] == "http_responses_total"
+    }
+
+
+@click.command()
+@click.option("--fixtures", type=click.Path(exists=True, file_okay=False), default="fixtures")
+@click.option("--timeout", type=float, default=0.6)
+@click.option("--attempts", type=int, default=5)
+def main(fixtures, timeout, attempts):
+    """Run against a flaky fake server and check the metrics files of the run."""
+    port = free_port()
+    server = multiprocessing.get_context("spawn").Process(
+        target=serve,
+        args=(Path(fixtures).resolve(), port),
+        kwargs={"latency": timeout / 2, "jitter": timeout, "error_rate": 0.1},
+        daemon=True,
+    )
+    server.start()
+    try:
+        wait_for(port)
+        for attempt in range(1, attempts + 1):
+            with tempfile.TemporaryDirectory() as workdir:
+                workdir = Path(workdir)
+                err = scrape(workdir, port, timeout)
+                for name in ["metrics.json", "metrics.prom"]:
+                    if not (workdir / name).exists():
+                        raise ValueError(f"Run {attempt} did not write {name} (run error: {err})")
+
+                summary = json.loads((workdir / "metrics.json").read_text(encoding="utf-8"))
+                seen = statuses(summary)
+                print(f"Run {attempt}: statuses {', '.join(sorted(seen))}, run error: {err}")
+                if "error" in seen and seen - {"error"}:
+                    print("Metrics were written for a run with failed and answered requests.")
+                    return
+    finally:
+        server.terminate()
+
+    raise ValueError(f"No run out of {attempts} had both a failed request and an HTTP status")
+
+
+if __name__ == "__main__":
+    main()
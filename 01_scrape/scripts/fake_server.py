@@ -0,0 +1,162 @@
+"""Serve a fixture corpus at the URLs of tweedekamer.nl, as a local stand-in for the site.
+
+The corpus is the synthetic one of scripts/make_fixtures.py, not recorded pages, so it only
+covers the markup the parsers rely on. Pages are looked up by path and query in the pages.json
+index of the corpus. Listings are rendered from the cards of all listing pages of the corpus,
+newest first and filtered on `fromdate`/`todate` like the site does, so shards and incremental
+runs see their own stemmingen. Past the last page the server answers "Geen zoekresultaten".
+Latency, jitter and a rate of 503 responses can be injected.
+
+Run from 01_scrape with `uv run python -m scripts.fake_server`, then scrape it with
+`uv run python -m cli run 2025-03-01 --base-url http://127.0.0.1:8000/`.
+"""
+
+import json
+import random
+import time
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+import click
+
+from scrape import xpath
+from scrape.site import SITE_URL
+from scripts.make_fixtures import LISTING_SIZE, dutch_date, listing
+
+LISTING_PATH = "/kamerstukken/stemmingsuitslagen"
+NO_RESULTS = "<html><body><main><p>Geen zoekresultaten</p></main></body></html>"
+
+CONTENT_TYPES = {
+    ".html": "text/html; charset=utf-8",
+    ".pdf": "application/pdf",
+    ".docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+}
+
+
+class FixtureServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address: tuple[str, int],
+        fixtures: Path,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+    ):
+        super().__init__(address, FixtureHandler)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.pages = {}
+        self.cards = []
+
+        index = json.loads((fixtures / "pages.json").read_text(encoding="utf-8"))
+        for page in index:
+            parts = urlsplit(page["url"])
+            path = fixtures / page["path"]
+            if page["kind"] == "listing":
+                doc = xpath.parse_html(path.read_bytes())
+                self.cards += xpath.parse_listing_cards(page["url"], doc)
+            else:
+                self.pages[f"{parts.path}?{parts.query}"] = path
+
+        # the site lists the newest stemmingen first
+        self.cards.sort(key=lambda card: card["stem_dt"], reverse=True)
+
+    def listing(self, from_date: str | None, to_date: str | None, page: int) -> bytes | None:
+        cards = [
+            card
+            for card in self.cards
+            if (from_date is None or card["stem_dt"] >= from_date)
+            and (to_date is None or card["stem_dt"] <= to_date)
+        ]
+        cards = cards[page * LISTING_SIZE : (page + 1) * LISTING_SIZE]
+        if not cards:
+            return None
+        return listing(
+            [
+                (
+                    card["stem_id"],
+                    parse_qs(urlsplit(card["link"]).query)["did"][0],
+                    dutch_date(date.fromisoformat(card["stem_dt"])),
+                )
+                for card in cards
+            ]
+        ).encode("utf-8")
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    # keep-alive, like the real site
+    protocol_version = "HTTP/1.1"
+    server: FixtureServer
+
+    def do_GET(self):
+        server = self.server
+        delay = server.latency + random.uniform(0, server.jitter)
+        if delay > 0:
+            time.sleep(delay)
+
+        if random.random() < server.error_rate:
+            self.send_response(503)
+            self.send_header("Retry-After", "0")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        parts = urlsplit(self.path)
+        if parts.path == LISTING_PATH:
+            query = parse_qs(parts.query)
+            body = server.listing(
+                from_date=query.get("fromdate", [None])[0],
+                to_date=query.get("todate", [None])[0],
+                page=int(query.get("page", ["0"])[0]),
+            )
+            return self.reply(body or NO_RESULTS.encode(), CONTENT_TYPES[".html"])
+
+        path = server.pages.get(f"{parts.path}?{parts.query}")
+        if path is None:
+            return self.reply(b"Not found", "text/plain", status=404)
+        self.reply(path.read_bytes(), CONTENT_TYPES.get(path.suffix, "application/octet-stream"))
+
+    def reply(self, body: bytes, content_type: str, status: int = 200):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(
+    fixtures: Path,
+    port: int,
+    host: str = "127.0.0.1",
+    latency: float = 0.0,
+    jitter: float = 0.0,
+    error_rate: float = 0.0,
+):
+    server = FixtureServer((host, port), fixtures, latency, jitter, error_rate)
+    with server:
+        server.serve_forever()
+
+
+@click.command()
+@click.option("--fixtures", type=click.Path(exists=True, file_okay=False), default="fixtures")
+@click.option("--host", type=str, default="127.0.0.1")
+@click.option("--port", type=int, default=8000)
+@click.option("--latency", type=float, default=0.0)
+@click.option("--jitter", type=float, default=0.0)
+@click.option("--error-rate", type=float, default=0.0)
+def main(fixtures, host, port, latency, jitter, error_rate):
+    """Serve the pages in FIXTURES as if they were tweedekamer.nl."""
+    print(f"Serving {fixtures} as {SITE_URL} on http://{host}:{port}/")
+    serve(Path(fixtures), port, host, latency, jitter, error_rate)
+
+
+if __name__ == "__main__":
+    main()
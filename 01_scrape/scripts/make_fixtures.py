@@ -0,0 +1,295 @@
+"""Generate the synthetic page corpus in fixtures/.
+
+The pages mimic the markup of tweedekamer.nl that the parsers rely on, including the odd cases
+(hoofdelijke stemmingen, missing uitslag, wetsvoorstellen, indieners without a link) and a
+roll call of all 150 kamerleden. They are checked in, so only rerun this after changing it.
+Benchmarks write larger corpora with `--stemmingen`.
+
+Run from 01_scrape with `uv run python -m scripts.make_fixtures`.
+"""
+
+import json
+from datetime import date, timedelta
+from io import BytesIO
+from pathlib import Path
+from zipfile import ZIP_DEFLATED, ZipFile, ZipInfo
+
+import click
+from docx import Document
+
+from scrape.dates import MONTHS
+
+BASE_URL = "https://www.tweedekamer.nl/"
+LISTING_PATH = (
+    "kamerstukken/stemmingsuitslagen?qry=%2A&fld_tk_categorie=Kamerstukken"
+    "&fld_prl_kamerstuk=Stemmingsuitslagen&fromdate={from_date}&todate={to_date}"
+    "&srt=date%3Adesc%3Adate&page={page}"
+)
+
+DAYS = ["10 maart 2025", "11 maart 2025", "13 maart 2025"]
+# larger corpora continue on the days after DAYS
+EXTRA_DAYS_FROM = date(2025, 3, 14)
+LISTING_SIZE = 15
+FRACTIES = [("VVD", 24), ("PVV", 37), ("GL-PvdA", 25), ("NSC", 20), ("D66", 9), ("BBB", 7)]
+
+
+def layout(body: str, title: str = "Tweede Kamer der Staten-Generaal") -> str:
+    # the navigation, scripts and footer that surround every page
+    nav = "".join(
+        f'<li class="m-nav__item"><a href="/sectie/{k}">Onderwerp {k}</a></li>' for k in range(150)
+    )
+    footer = "".join(f'<p class="u-text-small">Voettekst {k}</p>' for k in range(40))
+    return f"""<!DOCTYPE html>
+<html lang="nl"><head><meta charset="utf-8"><meta name="dcterms.title" content="{title}">
+<title>{title}</title><script>window.dataLayer = [];</script><style>.m-card {{ margin: 0 }}</style>
+</head><body><header><nav><ul>{nav}</ul></nav></header>
+<main>{body}</main>
+<footer>{footer}</footer></body></html>"""
+
+
+def listing(cards: list[tuple[str, str, str]]) -> str:
+    items = "".join(f"""
+<div class="u-mt-6 m-card">
+  <h4 class="u-mt-0"><a href="/kamerstukken/stemmingsuitslagen/detail?id={sid}&amp;did={did}">
+    Stemmingsuitslagen {d}</a></h4>
+  <time class="u-text-primary"> {d} </time>
+  <p class="u-text-dark-gray">{sid}</p>
+</div>""" for sid, did, d in cards)
+    return layout(items)
+
+
+def stemming(d: str, moties: list[tuple[str, str, str]]) -> str:
+    cards = "".join(f"""
+<div class="m-card">
+  <h3 class="m-card__title"><a href="/kamerstukken/moties/detail?id={mid}&amp;did={mdid}">
+    Motie {mid}</a></h3>
+  <p class="u-mt-8">Indiener: J. Jansen</p>
+  <p class="u-mt-8"><!-- besluit -->Besluit: <span class="u-font-bold">{b}.</span></p>
+</div>""" for mid, mdid, b in moties)
+    body = f"""<h2>Plenaire vergadering <span class="u-font-normal">{d}</span></h2>{cards}"""
+    return layout(body, title=f"Stemmingsuitslagen {d}")
+
+
+def votes(kind: str, thead: bool = False) -> str:
+    if kind == "hoofdelijk":
+        header = "<th>Fracties</th><th>Zetels</th><th>Kamerlid</th><th>Voor/Tegen</th>"
+        header += "<th>Vergissing</th>"
+        rows = """
+<tr><td rowspan="2">VVD</td><td rowspan="2">2</td><td>Jansen</td><td>Voor</td><td></td></tr>
+<tr><td>Pietersen</td><td>Tegen</td><td>Ja</td></tr>
+<tr><td rowspan="2">D66</td><td rowspan="2">2</td><td>de Vries</td><td>Tegen</td><td></td></tr>
+<tr><td>Bakker&nbsp;</td><td>Tegen</td><td></td></tr>"""
+        voor, totaal = 1, 4
+    else:
+        header = "<th>Fracties</th><th>Zetels</th><th>Voor/Tegen</th><th>Niet deelgenomen</th>"
+        rows = "".join(
+            f"<tr><td>{name}</td><td> {zetels} </td><td>{'Voor' if k % 2 else 'Tegen'}</td>"
+            f"<td>{'Niet deelgenomen' if k == 4 else ''}</td></tr>"
+            for k, (name, zetels) in enumerate(FRACTIES)
+        )
+        voor, totaal = 66, 122
+    table = (
+        f"<thead><tr>{header}</tr></thead><tbody><tr>{header}</tr>{rows}</tbody>"
+        if thead
+        else f"<tbody><tr>{header}</tr>{rows}</tbody>"
+    )
+    return f"""
+<h2>Stemmingsuitslagen</h2><h3> {"Aangenomen." if voor > totaal // 2 else "Verworpen."} </h3>
+<div class="m-vote-result"><div class="m-vote-result__bar" data-vote-result="{voor}"></div>
+<div class="m-vote-result__label"><span>Voor: {voor}</span></div>
+<div class="m-vote-result__label"><span class="h-visually-hidden">Vereist: {totaal // 2 + 1}</span>
+</div>
+<div class="m-vote-result__label"><span>Totaal: {totaal}</span></div></div>
+<div id="votes-details"><table class="h-table-bordered">{table}</table></div>"""
+
+
+def roll_call(members: int) -> str:
+    # a hoofdelijke stemming with one row per kamerlid, spread over the fracties
+    header = "<th>Fracties</th><th>Zetels</th><th>Kamerlid</th><th>Voor/Tegen</th>"
+    header += "<th>Vergissing</th>"
+    rows = []
+    for k, (name, _) in enumerate(FRACTIES):
+        leden = range(k, members, len(FRACTIES))
+        for j, lid in enumerate(leden):
+            fractie = (
+                f'<td rowspan="{len(leden)}">{name}</td><td rowspan="{len(leden)}">{len(leden)}</td>'
+                if j == 0
+                else ""
+            )
+            stem = "Voor" if lid % 3 else "Tegen"
+            rows.append(f"<tr>{fractie}<td>Kamerlid {lid}</td><td>{stem}</td><td></td></tr>")
+    voor = sum(1 for lid in range(members) if lid % 3)
+    return f"""
+<h2>Stemmingsuitslagen</h2><h3> {"Aangenomen." if voor > members // 2 else "Verworpen."} </h3>
+<div class="m-vote-result"><div class="m-vote-result__bar" data-vote-result="{voor}"></div>
+<div class="m-vote-result__label"><span>Voor: {voor}</span></div>
+<div class="m-vote-result__label"><span class="h-visually-hidden">Vereist: {members // 2 + 1}</span>
+</div>
+<div class="m-vote-result__label"><span>Totaal: {members}</span></div></div>
+<div id="votes-details"><table class="h-table-bordered">
+<tbody><tr>{header}</tr>{"".join(rows)}</tbody></table></div>"""
+
+
+def motie(mid: str, d: str, variant: str) -> str:
+    kind = "Wetsvoorstel" if variant == "wetsvoorstel" else "Motie"
+    modal = (
+        ""
+        if variant == "fallback"
+        else f"""<div class="m-modal__content"><p>De Kamer,</p>
+<p>gehoord de beraadslaging,</p><script>track("{mid}")</script>
+<p>verzoekt de regering  om&nbsp;het café {mid} <em>vóór</em> de zomer te openen,</p>
+<!-- einde --><p>en gaat over tot de orde van de dag.</p></div>"""
+    )
+    if variant == "rollcall":
+        uitslag = roll_call(150)
+    elif variant == "novotes":
+        uitslag = ""
+    elif variant == "hoofdelijk":
+        uitslag = votes("hoofdelijk")
+    else:
+        uitslag = votes("fracties", thead=variant == "thead")
+    return layout(f"""
+<h1><span class="u-text-primary u-font-normal">{kind}</span>: Motie van het lid Jansen over {mid}</h1>
+<div class="m-meta"><span class="h-visually-hidden">Nummer:</span> 36600-{mid[-3:]}</div>
+<div class="m-meta"><span class="h-visually-hidden">Datum:</span> {d}</div>
+<a class="m-button" aria-label="Download kamerstuk {mid}" href="/downloads/document?id={mid}">
+Download</a>
+{modal}
+<ul class="m-list">
+<li class="m-list__item m-list__item--variant-member"><span class="m-list__label">
+<span class="u-font-bold">Indiener</span> <a class="h-link-inverse" href="/lid">J. Jansen</a></span></li>
+<li class="m-list__item m-list__item--variant-member"><span class="m-list__label">
+<span class="u-font-bold">Medeindiener</span> P. Pietersen, minister van Financiën</span></li>
+<li class="m-list__item m-list__item--variant-member"><span class="m-list__label">
+<span class="u-font-bold">Medeindiener</span> A.  de Boer</span></li>
+</ul>
+{uitslag}""")
+
+
+def docx(text: str) -> bytes:
+    document = Document()
+    for k in range(3):
+        document.add_paragraph(f"{text}, alinea {k}")
+    table = document.add_table(rows=1, cols=2)
+    table.cell(0, 0).text = "Indiener"
+    table.cell(0, 1).text = "J. Jansen"
+    buffer = BytesIO()
+    document.save(buffer)
+
+    # repack with fixed timestamps, so regenerating gives the same bytes
+    packed = BytesIO()
+    with ZipFile(buffer) as source, ZipFile(packed, "w", ZIP_DEFLATED) as target:
+        for item in source.infolist():
+            info = ZipInfo(item.filename, date_time=(2025, 1, 1, 0, 0, 0))
+            info.compress_type = ZIP_DEFLATED
+            target.writestr(info, source.read(item.filename))
+    return packed.getvalue()
+
+
+def pdf(text: str) -> bytes:
+    # a single page with one line of Helvetica, which is all PdfReader needs
+    stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET"
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        "<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R"
+        " /Resources << /Font << /F1 5 0 R >> >> >>",
+        f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream",
+        "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    body = "%PDF-1.4\n"
+    offsets = []
+    for k, obj in enumerate(objects, 1):
+        offsets.append(len(body))
+        body += f"{k} 0 obj\n{obj}\nendobj\n"
+    xref = len(body)
+    body += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n"
+    body += "".join(f"{offset:010d} 00000 n \n" for offset in offsets)
+    body += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n"
+    return body.encode("latin-1")
+
+
+def days(count: int) -> list[str]:
+    extra = [EXTRA_DAYS_FROM + timedelta(days=k) for k in range(max(0, count - len(DAYS)))]
+    return (DAYS + [dutch_date(d) for d in extra])[:count]
+
+
+def dutch_date(day: date) -> str:
+    names = {number: name for name, number in MONTHS.items()}
+    return f"{day.day} {names[day.month]} {day.year}"
+
+
+VARIANTS = [
+    "default",
+    "hoofdelijk",
+    "novotes",
+    "thead",
+    "default",
+    "fallback",
+    "wetsvoorstel",
+    "rollcall",
+]
+
+
+def write_fixtures(output_dir: Path, stemmingen: int = len(DAYS)) -> list[dict]:
+    pages = []
+
+    def add(kind: str, url: str, name: str, content: str | bytes):
+        (output_dir / kind).mkdir(parents=True, exist_ok=True)
+        if isinstance(content, str):
+            content = content.encode("utf-8")
+        (output_dir / kind / name).write_bytes(content)
+        pages.append({"kind": kind, "url": url, "path": f"{kind}/{name}"})
+
+    stems = [(f"2025P{k:05d}", f"2025D{k:05d}", d) for k, d in enumerate(days(stemmingen))]
+    for page, start in enumerate(range(0, len(stems), LISTING_SIZE)):
+        listing_url = BASE_URL + LISTING_PATH.format(
+            from_date="2025-03-01", to_date="2025-03-31", page=page
+        )
+        add(
+            "listing",
+            listing_url,
+            f"page-{page}.html",
+            listing(stems[start : start + LISTING_SIZE]),
+        )
+
+    for k, (sid, did, d) in enumerate(stems):
+        moties = [
+            (
+                f"2025Z{k:02d}{j:03d}",
+                f"2025D9{k:02d}{j:02d}",
+                "Verworpen" if j % 2 else "Aangenomen",
+            )
+            for j in range(len(VARIANTS))
+        ]
+        url = BASE_URL + f"kamerstukken/stemmingsuitslagen/detail?id={sid}&did={did}"
+        add("stemming", url, f"{sid}.html", stemming(d, moties))
+
+        for (mid, mdid, _), variant in zip(moties, VARIANTS):
+            url = BASE_URL + f"kamerstukken/moties/detail?id={mid}&did={mdid}"
+            add("motie", url, f"{mid}.html", motie(mid, d, variant))
+
+            # the motie page has no text, the scraper falls back to the download
+            if variant == "fallback":
+                url = BASE_URL + f"downloads/document?id={mid}"
+                text = f"De Kamer verzoekt de regering het café {mid} te openen"
+                if k % 2:
+                    add("download", url, f"{mid}.pdf", pdf(text))
+                else:
+                    add("download", url, f"{mid}.docx", docx(text))
+
+    (output_dir / "pages.json").write_text(json.dumps(pages, indent=2) + "\n", encoding="utf-8")
+    return pages
+
+
+@click.command()
+@click.option("--output-dir", type=click.Path(file_okay=False), default="fixtures")
+@click.option("--stemmingen", type=int, default=len(DAYS))
+def main(output_dir, stemmingen):
+    """Write the fixture pages and their index to OUTPUT_DIR."""
+    pages = write_fixtures(Path(output_dir), stemmingen)
+    print(f"Wrote {len(pages)} pages to {output_dir}")
+
+
+if __name__ == "__main__":
+    main()
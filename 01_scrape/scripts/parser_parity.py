@@ -0,0 +1,75 @@
+"""Check that the bs4 and lxml parser backends extract the same data from the fixture corpus.
+
+Exits with an error on the first page where they differ, and reports the parse time of both.
+
+Run from 01_scrape with `uv run python -m scripts.parser_parity`.
+"""
+
+import json
+import time
+from pathlib import Path
+
+import click
+
+from scrape.main import PARSERS
+from scrape.site import GEEN_INDIENERS
+
+
+def extract(backend, kind: str, url: str, content: bytes) -> dict:
+    doc = backend.parse_html(content)
+    if kind == "listing":
+        return {"cards": backend.parse_listing_cards(url, doc)}
+    if kind == "stemming":
+        return {
+            "stemming": backend.parse_stemming_page_info(url, doc),
+            "motions": backend.parse_motion_cards(url, doc),
+        }
+
+    result = {"motie": backend.parse_motie_info(url, doc)}
+    if result["motie"]["type"].lower().strip() not in GEEN_INDIENERS:
+        result["indieners"] = backend.parse_indieners_info(url, doc)
+    result["uitslag"] = backend.parse_uitslag_info(url, doc)
+    if result["uitslag"] is not None:
+        result["details"] = backend.parse_details_info(url, doc)
+    return result
+
+
+def timeit(backend, pages: list[tuple[str, str, bytes]], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for kind, url, content in pages:
+            extract(backend, kind, url, content)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+@click.command()
+@click.option("--fixtures", type=click.Path(exists=True, file_okay=False), default="fixtures")
+@click.option("--repeat", type=int, default=5)
+def main(fixtures, repeat):
+    """Compare every parser backend against bs4 on the pages in FIXTURES."""
+    fixtures = Path(fixtures)
+    index = json.loads((fixtures / "pages.json").read_text(encoding="utf-8"))
+    pages = [
+        (p["kind"], p["url"], (fixtures / p["path"]).read_bytes())
+        for p in index
+        if p["kind"] != "download"
+    ]
+
+    for name, backend in PARSERS.items():
+        for kind, url, content in pages:
+            expected = extract(PARSERS["bs4"], kind, url, content)
+            actual = extract(backend, kind, url, content)
+            if actual != expected:
+                raise ValueError(f"Parser {name} differs on {url}:\n{expected}\n{actual}")
+    print(f"{len(pages)} pages, all parsers agree")
+
+    times = {name: timeit(backend, pages, repeat) for name, backend in PARSERS.items()}
+    for name, t in times.items():
+        print(f"  {name:5s} {t * 1000:8.1f} ms ({t / len(pages) * 1000:.2f} ms/page)")
+    print(f"  speedup: {times['bs4'] / times['lxml']:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -94,8 +94,12 @@ def truncate_db():
 
 @cli.command("import-csv")
 @click.argument("data_dir", default="../data")
-def import_csv(data_dir):
-    sp.run(f"uv run python scripts/import_csv.py {data_dir}", shell=True, check=True)
+@click.option("--workers", type=int, default=1)
+@click.option("--full-refresh", is_flag=True, default=False)
+def import_csv(data_dir, workers, full_refresh):
+    """Load new or changed stemming folders, see the load_manifest table."""
+    flags = f" --workers {workers}" + (" --full-refresh" if full_refresh else "")
+    sp.run(f"uv run python scripts/import_csv.py {data_dir}{flags}", shell=True, check=True)
 
 
 @cli.command("export-csv")
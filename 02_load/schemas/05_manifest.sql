@@ -0,0 +1,9 @@
+CREATE TABLE IF NOT EXISTS load_manifest (
+    folder TEXT PRIMARY KEY,
+    stemming_id TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    loaded_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+-- Sizes and modification times of the files, so unchanged folders are not hashed again
+ALTER TABLE load_manifest ADD COLUMN IF NOT EXISTS file_stats TEXT;
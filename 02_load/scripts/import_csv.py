@@ -1,51 +1,245 @@
 import csv
+import hashlib
+import io
 import os
+from concurrent.futures import ThreadPoolExecutor
+from itertools import batched
 from pathlib import Path
 
 import click
 import polars as pl
-import psycopg2
-from dateparser import parse as parse_date
+from dates import dutch_date_expr
 from dotenv import load_dotenv
+from psycopg2.extras import execute_values
+from psycopg2.pool import ThreadedConnectionPool
 from tqdm import tqdm
 
 CSV_FILE_ORDER = ["stemming.csv", "motie.csv", "indieners.csv", "details.csv"]
 
+# Same columns and order as the scraper writes them
+TABLE_SCHEMAS = {
+    "stemming": {
+        "stemming_id": pl.String,
+        "stemming_did": pl.String,
+        "titel": pl.String,
+        "datum": pl.String,
+        "type": pl.String,
+    },
+    "motie": {
+        "stemming_id": pl.String,
+        "motie_id": pl.String,
+        "motie_did": pl.String,
+        "document_nr": pl.String,
+        "datum": pl.String,
+        "titel": pl.String,
+        "type": pl.String,
+        "text": pl.String,
+        "is_fallback": pl.Boolean,
+        "download": pl.String,
+        "besluit": pl.String,
+        "uitslag": pl.String,
+        "voor": pl.Int64,
+        "vereist": pl.Int64,
+        "totaal": pl.Int64,
+    },
+    "indieners": {
+        "stemming_id": pl.String,
+        "motie_id": pl.String,
+        "name": pl.String,
+        "type": pl.String,
+    },
+    "details": {
+        "stemming_id": pl.String,
+        "motie_id": pl.String,
+        "fractie": pl.String,
+        "zetels": pl.String,
+        "kamerlid": pl.String,
+        "stem": pl.String,
+        "niet_deelgenomen": pl.String,
+        "vergissing": pl.Boolean,
+    },
+}
+
+# stemming folders per transaction
+DEFAULT_BATCH_SIZE = 200
+
+MANIFEST_SQL = Path(__file__).resolve().parents[1] / "schemas" / "05_manifest.sql"
+
 
 # Load top-level .env
 env_path = Path.cwd() / "default.env"
 load_dotenv(dotenv_path=env_path, override=True)
 
 
-def load_csv_to_table(conn, csv_path: str, table_name: str):
-    df = pl.read_csv(csv_path, encoding="utf-8")
+def scan_table(folders: list[dict[str, list[Path]]], table_name: str) -> pl.LazyFrame:
+    # The files of this table in all folders
+    schema = TABLE_SCHEMAS[table_name]
+    paths = [path for files in folders for path in files[table_name]]
+    if not paths:
+        # A month without rows for this table, e.g. without roll call votes
+        lf = pl.LazyFrame(schema=schema)
+    elif paths[0].suffix == ".parquet":
+        stemming_paths = [path for files in folders for path in files["stemming"]]
+        lf = scan_parquet(paths, stemming_paths, table_name)
+    else:
+        # One lazy scan over the files of all folders, without type inference
+        lf = pl.scan_csv(paths, schema=schema, encoding="utf8")
 
     # Convert date-like columns
-    df = df.with_columns(
-        pl.col(col).map_elements(
-            function=lambda x: parse_date(x, languages=["nl"]).date() if x else None,
-            return_dtype=pl.Date(),
-        )
-        for col in df.columns
+    lf = lf.with_columns(
+        dutch_date_expr(col)
+        for col in TABLE_SCHEMAS[table_name]
         if "datum" in col.lower() or "date" in col.lower()
     )
 
-    pk_cols = get_primary_key_columns(conn, table_name)
+    return lf
 
-    with conn.cursor() as cur:
-        for row in df.iter_rows(named=True):
-            row_dict = dict(row)
 
-            # Drop PK columns that are None -> let DB default apply
-            cols = [c for c, v in row_dict.items() if not (c in pk_cols and v is None)]
-            vals = [row_dict[c] for c in cols]
+def scan_parquet(paths: list[Path], stemming_paths: list[Path], table_name: str) -> pl.LazyFrame:
+    # Until a partition is compacted, a stemming that was written in more than one flush only
+    # keeps the rows of the latest, as in the scraper's compaction. Every flush writes the
+    # stemming table and names the parts of all tables alike, so that table has the flushes.
+    flushes = (
+        scan_parts(stemming_paths)
+        .group_by("stemming_id")
+        .agg(pl.col("part").max().alias("latest"), pl.col("part").n_unique().alias("flushes"))
+    )
+    lf = (
+        scan_parts(paths)
+        .join(flushes, on="stemming_id")
+        .filter((pl.col("flushes") == 1) | (pl.col("part") == pl.col("latest")))
+    )
+
+    # Categoricals back to strings, without the year/month columns of the partitions
+    return lf.select(pl.col(col).cast(dtype) for col, dtype in TABLE_SCHEMAS[table_name].items())
+
+
+def scan_parts(paths: list[Path]) -> pl.LazyFrame:
+    # With the file name of the part every row comes from
+    lf = pl.scan_parquet(paths, hive_partitioning=True, include_file_paths="part")
+    return lf.with_columns(pl.col("part").str.extract(r"([^/\\]+)$"))
+
+
+def key_value(col: str, defaults: dict, alias: str = "") -> str:
+    # PK columns that are None -> let DB default apply
+    return f"COALESCE({alias}{col}, {defaults[col]})" if col in defaults else f"{alias}{col}"
+
+
+def copy_to_table(cur, df: pl.DataFrame, table_name: str, pk_cols: list[str], defaults: dict):
+    staging = f"staging_{table_name}"
+    cols = ",".join(df.columns)
+
+    # Same columns, but without the NOT NULL constraints of the PK
+    cur.execute(
+        f"CREATE TEMP TABLE IF NOT EXISTS {staging} ON COMMIT DELETE ROWS "
+        f"AS SELECT * FROM {table_name} WITH NO DATA"
+    )
+
+    # Stream the rows into the staging table
+    buffer = io.StringIO()
+    df.write_csv(buffer)
+    buffer.seek(0)
+    cur.copy_expert(f"COPY {staging} ({cols}) FROM STDIN WITH (FORMAT csv, HEADER true)", buffer)
+
+    # Insert new rows, overwrite the ones of stemmingen that were scraped again
+    values = ",".join(key_value(c, defaults) if c in pk_cols else c for c in df.columns)
+    updates = ",".join(f"{c} = EXCLUDED.{c}" for c in df.columns if c not in pk_cols)
+    cur.execute(
+        f"INSERT INTO {table_name} ({cols}) SELECT {values} FROM {staging} "
+        f"ON CONFLICT ({','.join(pk_cols)}) "
+        + (f"DO UPDATE SET {updates}" if updates else "DO NOTHING")
+    )
+
+
+def delete_stale_rows(cur, table_name: str, pk_cols: list[str], defaults: dict):
+    # Rows of the loaded stemmingen that are not in the new scrape anymore
+    staging = f"staging_{table_name}"
+    keys = " AND ".join(f"t.{c} = {key_value(c, defaults, alias='s.')}" for c in pk_cols)
+    cur.execute(
+        f"DELETE FROM {table_name} t "
+        f"WHERE t.stemming_id IN (SELECT stemming_id FROM staging_stemming) "
+        f"AND NOT EXISTS (SELECT 1 FROM {staging} s WHERE {keys})"
+    )
+
 
-            placeholders = ",".join(["%s"] * len(cols))
-            insert_sql = f"INSERT INTO {table_name} ({','.join(cols)}) VALUES ({placeholders})"
+def find_folders(data_dir: Path) -> list[tuple[str, dict[str, list[Path]]]]:
+    # Stemming folders of CSV files and month partitions of a Parquet dataset, with the files of
+    # every table, in date order
+    folders = []
+    for path in sorted(p.parent for p in data_dir.glob("**/stemming.csv")):
+        files = {csv_file.replace(".csv", ""): [path / csv_file] for csv_file in CSV_FILE_ORDER}
+        folders.append((path.relative_to(data_dir).as_posix(), files))
 
-            cur.execute(insert_sql, vals)
+    partitions = data_dir.glob("stemming/year=*/month=*")
+    for partition in sorted(p.relative_to(data_dir / "stemming") for p in partitions):
+        files = {
+            table_name: sorted((data_dir / table_name / partition).glob("*.parquet"))
+            for table_name in TABLE_SCHEMAS
+        }
+        folders.append((partition.as_posix(), files))
+    return folders
 
-    conn.commit()
+
+def folder_stemming_id(files: dict[str, list[Path]]) -> str:
+    stemming_paths = files["stemming"]
+    if stemming_paths[0].suffix == ".csv":
+        return stemming_paths[0].parent.name
+    # The manifest records a month under its latest stemming
+    return pl.scan_parquet(stemming_paths).select(pl.col("stemming_id").max()).collect().item()
+
+
+def folder_stats(files: dict[str, list[Path]]) -> str:
+    # Name, size and modification time of every file, which only takes a stat per file
+    stats = []
+    for table_name, paths in files.items():
+        for path in paths:
+            stat = path.stat()
+            stats.append(f"{table_name}/{path.name}:{stat.st_size}:{stat.st_mtime_ns}")
+    return " ".join(stats)
+
+
+def folder_hash(files: dict[str, list[Path]]) -> str:
+    digest = hashlib.sha256()
+    for paths in files.values():
+        for path in paths:
+            digest.update(path.name.encode())
+            digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def read_manifest(conn) -> dict[str, tuple[str, str | None]]:
+    with conn, conn.cursor() as cur:
+        cur.execute(MANIFEST_SQL.read_text(encoding="utf-8"))
+        cur.execute("SELECT folder, content_hash, file_stats FROM load_manifest")
+        return {folder: (content_hash, stats) for folder, content_hash, stats in cur.fetchall()}
+
+
+def update_manifest(cur, rows: list[tuple[str, str, str, str]]):
+    execute_values(
+        cur,
+        """
+        INSERT INTO load_manifest (folder, stemming_id, content_hash, file_stats) VALUES %s
+        ON CONFLICT (folder) DO UPDATE
+        SET stemming_id = EXCLUDED.stemming_id,
+            content_hash = EXCLUDED.content_hash,
+            file_stats = EXCLUDED.file_stats,
+            loaded_at = now()
+        """,
+        rows,
+    )
+
+
+def update_file_stats(cur, rows: list[tuple[str, str]]):
+    # Folders whose files were touched, but still have the loaded contents
+    execute_values(
+        cur,
+        """
+        UPDATE load_manifest m SET file_stats = v.file_stats
+        FROM (VALUES %s) AS v (folder, file_stats)
+        WHERE m.folder = v.folder
+        """,
+        rows,
+    )
 
 
 def get_primary_key_columns(conn, table_name: str) -> list[str]:
@@ -62,32 +256,104 @@ def get_primary_key_columns(conn, table_name: str) -> list[str]:
         return [r[0] for r in cur.fetchall()]
 
 
+def get_column_defaults(conn, table_name: str) -> dict[str, str]:
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            SELECT column_name, column_default
+            FROM information_schema.columns
+            WHERE table_name = %s
+              AND column_default IS NOT NULL;
+            """,
+            (table_name,),
+        )
+        return dict(cur.fetchall())
+
+
+def load_batch(conn, batch: list, tables: list[str], pk_cols: dict, defaults: dict, prune: bool):
+    # One transaction per batch, tables in FK order
+    rows = 0
+    with conn, conn.cursor() as cur:
+        for table_name in tables:
+            lf = scan_table([files for files, _ in batch], table_name)
+            df = lf.collect(engine="streaming")
+            copy_to_table(cur, df, table_name, pk_cols[table_name], defaults[table_name])
+            rows += len(df)
+
+        # Children first, so no FK points to a deleted motie
+        if prune:
+            for table_name in reversed(tables[1:]):
+                delete_stale_rows(cur, table_name, pk_cols[table_name], defaults[table_name])
+
+        update_manifest(cur, [row for _, row in batch])
+    return rows
+
+
 @click.command()
 @click.argument("data_dir", type=click.Path(exists=True, file_okay=False, dir_okay=True))
-def main(data_dir):
-    """Load CSV files from DATA_DIR into Postgres."""
+@click.option("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+@click.option("--workers", type=int, default=1)
+@click.option("--full-refresh", is_flag=True, default=False)
+def main(data_dir, batch_size, workers, full_refresh):
+    """Load new or changed CSV folders or Parquet partitions from DATA_DIR into Postgres."""
     data_dir = Path(data_dir)
 
-    conn = psycopg2.connect(
+    pool = ThreadedConnectionPool(
+        1,
+        workers,
         dbname=os.getenv("POSTGRES_DB"),
         user=os.getenv("POSTGRES_USER"),
         password=os.getenv("POSTGRES_PASSWORD"),
         host=os.getenv("POSTGRES_HOST"),
         port=os.getenv("POSTGRES_PORT"),
     )
+    # Close every connection, also when a batch fails
+    try:
+        conn = pool.getconn()
+
+        tables = [csv_file.replace(".csv", "") for csv_file in CSV_FILE_ORDER]
+        pk_cols = {table_name: get_primary_key_columns(conn, table_name) for table_name in tables}
+        defaults = {table_name: get_column_defaults(conn, table_name) for table_name in tables}
+
+        # Only folders that are not in the manifest, or whose files changed since. Files are only
+        # hashed when their sizes or modification times differ from the last load
+        manifest = read_manifest(conn)
+        dirs = find_folders(data_dir)
+        todo = []
+        touched = []
+        for folder, files in dirs:
+            loaded_hash, loaded_stats = manifest.get(folder, (None, None))
+            stats = folder_stats(files)
+            if not full_refresh and stats == loaded_stats:
+                continue
+            content_hash = folder_hash(files)
+            if full_refresh or content_hash != loaded_hash:
+                todo.append((files, (folder, folder_stemming_id(files), content_hash, stats)))
+            else:
+                touched.append((folder, stats))
+        if touched:
+            with conn, conn.cursor() as cur:
+                update_file_stats(cur, touched)
+        pool.putconn(conn)
+        print(f"Loading {len(todo)} of {len(dirs)} folders, {len(dirs) - len(todo)} unchanged.")
 
-    # Walk through all stemming folders
-    dirs = [p.parent for p in data_dir.glob("**/stemming.csv")]
-    for path in tqdm(dirs):
-        if not path.is_dir():
-            raise ValueError(f"folder is missing ({path})")
+        # Shards of consecutive dates, small enough to keep every worker busy
+        size = max(1, min(batch_size, -(-len(todo) // workers)))
 
-        for csv_file in CSV_FILE_ORDER:
-            csv_path = path / csv_file
-            table_name = csv_file.replace(".csv", "")
-            load_csv_to_table(conn, csv_path, table_name)
+        def run_batch(batch):
+            conn = pool.getconn()
+            try:
+                prune = full_refresh or any(folder in manifest for _, (folder, *_) in batch)
+                return load_batch(conn, batch, tables, pk_cols, defaults, prune)
+            finally:
+                pool.putconn(conn)
 
-    conn.close()
+        with tqdm(unit="rows", unit_scale=True) as progress:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                for rows in executor.map(run_batch, batched(todo, size)):
+                    progress.update(rows)
+    finally:
+        pool.closeall()
 
 
 if __name__ == "__main__":